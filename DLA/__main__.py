@@ -6,7 +6,7 @@ import pkgutil
 import sys
 from pathlib import Path
 from pkgutil import get_data
-from typing import Any, Dict, List, Optional, Union, cast
+from typing import Any, Dict, List, Optional, Tuple, Union, cast
 
 import click
 import yaml
@@ -42,6 +42,17 @@ def cli() -> None:
 
 
 @cli.command()
+@click.option(
+    '-c', '--checkpoint',
+    nargs=1, default=None, type=Path,
+    help='file, to which checkpoints are saved  [default: checkpoint, from '
+    'which simulation is continued, or new <timestamp>-<pid>.ckpt file]'
+)
+@click.option(
+    '-r', '--resume',
+    nargs=1, default=None, type=click.Path(exists=True, dir_okay=False),
+    help='checkpoint, from which simulation is continued'
+)
 @click.argument(
     'config',
     required=False,
@@ -53,10 +64,15 @@ def cli() -> None:
         allow_dash=True
     )
 )
-def simulate(config: Optional[str]) -> None:
+def simulate(
+    checkpoint: Optional[Path],
+    resume: Optional[str],
+    config: Optional[str]
+) -> None:
     """Run Diffusion Limited Aggregations with provided configuration
 
-    CONFIG - simulation configuration file
+    CONFIG - simulation configuration file, when resuming only its display
+    settings are used
     """
 
     # Suppress pygame banner
@@ -71,7 +87,10 @@ def simulate(config: Optional[str]) -> None:
     setattr(DLA, 'config_dict', config_dict)
     from DLA.simulation import main
 
-    main()
+    if resume is None:
+        main(checkpoint=checkpoint)
+    else:
+        main(checkpoint=checkpoint, resume=Path(resume))
 
 
 @cli.command()
@@ -80,6 +99,13 @@ def simulate(config: Optional[str]) -> None:
     nargs=1, default=Path('.'), type=Path, show_default=True,
     help='output folder'
 )
+@click.option(
+    '--rebuild-manifest',
+    default=False,
+    show_default=True,
+    is_flag=True,
+    help='build manifest of results again from results in output folder'
+)
 @click.argument(
     'config',
     required=False,
@@ -91,7 +117,7 @@ def simulate(config: Optional[str]) -> None:
         allow_dash=True
     )
 )
-def server(out: Path, config: Optional[str]) -> None:
+def server(out: Path, rebuild_manifest: bool, config: Optional[str]) -> None:
     """Run server to initialize simulations running on clients.
 
     CONFIG - server configuration file
@@ -100,7 +126,51 @@ def server(out: Path, config: Optional[str]) -> None:
     import DLA.server as s
     setattr(s, 'config_dict', config_dict)
     from DLA.server.server import server as serv
-    asyncio.run(serv(out))
+    asyncio.run(serv(out, rebuild_manifest))
+
+
+@cli.command()
+@click.option(
+    '-o', '--out',
+    nargs=1, default=Path('.'), type=Path, show_default=True,
+    help='output folder'
+)
+@click.option(
+    '-j', '--jobs',
+    nargs=1, default=os.cpu_count(), type=int, show_default=True,
+    help='number of processes running simulations'
+)
+@click.option(
+    '-r', '--replicas',
+    nargs=1, default=1, type=click.IntRange(min=1), show_default=True,
+    help='number of samples of memory value simulated together by process'
+)
+@click.argument(
+    'config',
+    required=False,
+    nargs=1,
+    type=click.Path(
+        exists=True,
+        dir_okay=False,
+        resolve_path=True,
+        allow_dash=True
+    )
+)
+def sweep(
+    out: Path,
+    jobs: int,
+    replicas: int,
+    config: Optional[str]
+) -> None:
+    """Run simulations for all memory values from server configuration
+    on local processes. Results already present in output folder are not
+    computed again.
+
+    CONFIG - server configuration file
+    """
+    config_dict = load_config(config, 'DLA.server', 'server_config.yml')
+    from DLA.sweep import sweep as run_sweep
+    run_sweep(cast(Dict[str, Any], config_dict), out, jobs, replicas)
 
 
 @cli.command()
@@ -140,7 +210,7 @@ def client(clients: int) -> None:
 def render(sim_file: str, only_stuck: bool) -> None:
     """Render particles from past simulation.
 
-    SIM_FILE - path to `.pickle` file
+    SIM_FILE - path to `.pickle` or `.dla` file
     """
     import DLA
     DLA.GREEN = (0, 0, 0)  # type: ignore
@@ -151,6 +221,43 @@ def render(sim_file: str, only_stuck: bool) -> None:
     renderer.render(Path(sim_file), only_stuck)
 
 
+@cli.command()
+@click.option(
+    '-d', '--delete',
+    default=False,
+    show_default=True,
+    is_flag=True,
+    help='remove `.pickle` files after conversion'
+)
+@click.argument(
+    'paths',
+    required=True,
+    nargs=-1,
+    type=click.Path(exists=True, resolve_path=True, path_type=Path)
+)
+def convert(delete: bool, paths: Tuple[Path, ...]) -> None:
+    """Convert results of simulations from `.pickle` files to columnar
+    `.dla` files, which arrays can be memory-mapped.
+
+    PATHS - `.pickle` files or folders with them
+    """
+    from DLA.results import PICKLE_SUFFIX
+    from DLA.results import convert as convert_result
+
+    files = [
+        file
+        for path in paths
+        for file in (
+            sorted(path.glob(f'*{PICKLE_SUFFIX}')) if path.is_dir()
+            else [path]
+        )
+    ]
+    for file in files:
+        click.echo(convert_result(file))
+        if delete:
+            file.unlink()
+
+
 @cli.command()
 def configs() -> None:
     """Copy default simulation and server configuration files.
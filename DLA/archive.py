@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import os
+import pickle
+from pathlib import Path
+from typing import Any, Dict, Final, List, Optional
+
+import numpy as np
+
+from DLA.results import ALIGNMENT, MAGIC, loads
+
+# Folder of archive in output folder of server
+ARCHIVE_FOLDER: Final[str] = 'archive'
+INDEX_FILE: Final[str] = 'index'
+# Record of index for every result in archive
+INDEX_DTYPE: Final[np.dtype] = np.dtype([
+    ('memory', '<f8'),
+    ('offset', '<u8'),
+    ('length', '<u8'),
+    ('name', 'S64'),
+])
+
+
+def _load(data: np.ndarray) -> Dict[str, Any]:
+    if bytes(data[:len(MAGIC)]) == MAGIC:
+        return loads(data)
+    return pickle.loads(data)
+
+
+class ResultsArchive:
+    """
+    Results of simulations appended to one segment file per memory value,
+    instead of separate files. Results are written as received (`.pickle`
+    or `.dla`), every one starting at multiple of `ALIGNMENT` bytes, so
+    arrays of `.dla` results stay aligned.
+
+    Index file has one `INDEX_DTYPE` record per result: memory value,
+    offset and length of result in its segment and name of result file.
+    Record is appended after result, so interrupted write leaves at most
+    unused bytes at the end of segment.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self.index_path = directory / INDEX_FILE
+
+    def segment_path(self, memory: float) -> Path:
+        return self.directory / f'{float(memory)!r}.segment'
+
+    def append(self, memory: float, name: str, data: bytes) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.segment_path(memory), 'ab') as f:
+            end = f.tell()
+            offset = -(-end // ALIGNMENT) * ALIGNMENT
+            f.write(bytes(offset - end))
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+        record = np.array(
+            [(memory, offset, len(data), Path(name).name.encode('utf-8'))],
+            dtype=INDEX_DTYPE
+        )
+        with open(self.index_path, 'ab') as f:
+            # Part of record left by interrupted write is overwritten
+            f.truncate(f.tell() - f.tell() % INDEX_DTYPE.itemsize)
+            f.write(record.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+    def remove_last(self) -> None:
+        """
+        Removes record of result appended last from index, when it can't be
+        kept. Result stays in its segment as unused bytes.
+        """
+        with open(self.index_path, 'ab') as f:
+            end = f.tell() - f.tell() % INDEX_DTYPE.itemsize
+            f.truncate(max(end - INDEX_DTYPE.itemsize, 0))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def entries(self, memory: Optional[float] = None) -> np.ndarray:
+        """
+        Returns records of index, of all results or results of memory
+        value.
+        """
+        if not self.index_path.exists():
+            return np.empty(0, dtype=INDEX_DTYPE)
+        raw = self.index_path.read_bytes()
+        entries = np.frombuffer(
+            raw[:len(raw) - len(raw) % INDEX_DTYPE.itemsize],
+            dtype=INDEX_DTYPE
+        )
+        if memory is not None:
+            entries = entries[entries['memory'] == memory]
+        return entries
+
+    def read(self, entry: np.void) -> bytes:
+        """
+        Returns result of index record, as it was received.
+        """
+        with open(self.segment_path(entry['memory']), 'rb') as f:
+            f.seek(int(entry['offset']))
+            return f.read(int(entry['length']))
+
+    def load(self, entry: np.void) -> Dict[str, Any]:
+        """
+        Reads result of index record. Arrays of `.dla` result are memory
+        maps of its segment.
+        """
+        segment = np.memmap(
+            self.segment_path(entry['memory']), dtype=np.uint8, mode='r',
+            offset=int(entry['offset']), shape=(int(entry['length']),)
+        )
+        return _load(segment)
+
+    def load_all(self, memory: float) -> List[Dict[str, Any]]:
+        """
+        Reads all results of memory value from one memory map of its
+        segment.
+        """
+        entries = self.entries(memory)
+        if not entries.size:
+            return []
+        segment = np.memmap(
+            self.segment_path(memory), dtype=np.uint8, mode='r'
+        )
+        return [
+            _load(segment[entry['offset']:entry['offset'] + entry['length']])
+            for entry in entries
+        ]
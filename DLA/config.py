@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Final, Tuple
+from typing import Any, Dict, Final, Optional, Tuple
 
 import numpy as np
 
@@ -20,17 +20,30 @@ except ImportError:
             'radius': 3.0,
             'num': 1000,
             'start_pos': (256, 256),
+            'spawn': 'box',
+            'launch_margin': 12.0,
+            'kill_factor': 3.0,
+            'in_flight': 100,
         },
 
         'system': {
             'push_out_tries': 10,
             'max_steps': 4000,
-            'regen_after_updates': 200,
+            'threads': 1,
+            'max_leap': 1,
+            'leap_sigmas': 6.0,
+            'seed': None,
+            'checkpoint_steps': 0,
+            'record_steps': 0,
+            'result_format': 'pickle',
         },
 
         'planes': {
             'min_box_size': 0.5,
+            'cutoff_box_size': 0,
             'particle_collision_plane_size': 32,
+            'flat_tree': False,
+            'collision_engine': 'quadtree',
         },
 
         'simulation': {
@@ -53,19 +66,79 @@ USE_PYGAME: Final[bool] = (
 PRINT_RESULTS: Final[bool] = config_dict['display']['print_results']
 WINDOW_SIZE_FOR_RENDERING: Final[Tuple[int, int]] = (WINDOW_SIZE, WINDOW_SIZE)
 
-RADIUS: Final[float] = config_dict['particles']['radius']
-NUM_OF_PARTICLES: Final[int] = config_dict['particles']['num']
-STARTING_POS: Final[Tuple[float, float]] = \
-    config_dict['particles']['start_pos']
 
-PUSH_OUT_TRIES: Final[int] = config_dict['system']['push_out_tries']
-MAX_STEPS: Final[int] = config_dict['system']['max_steps']
-REGENERATE_AFTER: Final[int] = config_dict['system']['regen_after_updates']
+class Config:
+    """
+    Parameters of one simulation, read from configuration with the same
+    structure as `config.yml`. Display settings are shared by the whole
+    process and stay module constants.
+    """
 
-MIN_BOX_SIZE: Final[float] = config_dict['planes']['min_box_size']
-PARTICLE_PLANE_SIZE: Final[float] = \
-    config_dict['planes']['particle_collision_plane_size']
-SECOND_MIN_BOX_SIZE: Final[float] = 2 ** (np.log2(MIN_BOX_SIZE) + 1)
+    def __init__(self, config: Dict[str, Any]) -> None:
+        particles = config['particles']
+        system = config['system']
+        planes = config['planes']
+        simulation = config['simulation']
 
-ALPHA: Final[float] = config_dict['simulation']['step_strength']
-BETA: Final[float] = config_dict['simulation']['memory']
+        self.window_size: int = config['display']['window_size']
+
+        self.radius: float = particles['radius']
+        self.num_of_particles: int = particles['num']
+        self.start_pos: Tuple[float, float] = particles['start_pos']
+        self.spawn_on_circle: bool = (
+            particles.get('spawn', 'box') == 'circle'
+        )
+        self.launch_margin: float = \
+            particles.get('launch_margin', 4 * self.radius)
+        self.kill_factor: float = particles.get('kill_factor', 3.0)
+        self.in_flight: int = \
+            particles.get('in_flight', self.num_of_particles)
+
+        self.push_out_tries: int = system['push_out_tries']
+        self.max_steps: int = system['max_steps']
+        self.threads: int = system.get('threads', 1)
+        self.max_leap: int = system.get('max_leap', 1)
+        self.leap_sigmas: float = system.get('leap_sigmas', 6.0)
+        self.seed: Optional[int] = system.get('seed', None)
+        self.checkpoint_steps: int = system.get('checkpoint_steps', 0)
+        self.record_steps: int = system.get('record_steps', 0)
+        self.columnar_results: bool = (
+            system.get('result_format', 'pickle') == 'columnar'
+        )
+
+        self.min_box_size: float = planes['min_box_size']
+        self.particle_plane_size: float = \
+            planes['particle_collision_plane_size']
+        # Planes aren't divided into boxes smaller than cutoff, which can't
+        # be bigger than eighth of plane with particles (two levels of its
+        # sub planes stay above cutoff), smaller boxes are counted from
+        # positions of particles
+        self.cutoff_box_size: float = max(
+            min(
+                planes.get('cutoff_box_size', 0),
+                self.particle_plane_size / 8
+            ),
+            self.min_box_size
+        )
+        self.second_min_box_size: float = \
+            2 ** (np.log2(self.cutoff_box_size) + 1)
+        self.flat_tree: bool = planes.get('flat_tree', False)
+        self.use_cell_list: bool = (
+            planes.get('collision_engine', 'quadtree') == 'grid'
+        )
+
+        self.alpha: float = simulation['step_strength']
+        self.beta: float = simulation['memory']
+        # Otherwise variance of steps grows without bound
+        if not -1 < self.beta < 1:
+            raise ValueError(
+                f'memory must be in range (-1, 1), got {self.beta}'
+            )
+
+        # Particles closer than 2 * radius + typical step are in the same
+        # or neighbouring cell
+        self.cell_size: float = 2 * self.radius + self.alpha
+
+
+# Configuration of simulation started from command line
+CONFIG: Final[Config] = Config(config_dict)
@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+from copy import copy
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+from DLA import Vec
+from DLA.config import Config
+from DLA.particles.walking_particles import NOISE_STEPS, WalkingParticles
+from DLA.particles.utils import NoiseBuffer
+from DLA.simulation import Simulation
+from DLA.utils import (
+    cell_lists_collision_times,
+    collision_cells_collision_times,
+    move_walkers,
+    update_steps
+)
+
+
+class Ensemble:
+    """
+    Independent simulations (replicas) with the same configuration, apart
+    from seed, updated together.
+
+    Per walker arrays of all replicas are kept in shared arrays of shape
+    `(replicas, walkers, ...)`, so steps of walkers of all replicas are
+    drawn and made by single calls. Times of collision are also computed
+    by one call for all replicas, each with its own stuck particles. Every
+    replica is a `Simulation` and gives the same results as one, but its
+    steps are drawn from noise shared by the whole ensemble.
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        replicas: int,
+        out_dir: Path = Path('.')
+    ) -> None:
+        self.config = config
+        # Last seed is used for noise of all replicas
+        seeds = np.random.SeedSequence(config.seed).spawn(replicas + 1)
+        self.replicas: List[Simulation] = []
+        for seed in seeds[:-1]:
+            replica_config = copy(config)
+            replica_config.seed = int(seed.generate_state(1)[0])
+            self.replicas.append(Simulation(replica_config, out_dir))
+        self.running: List[Simulation] = list(self.replicas)
+
+        # Rows past `size` of replica are not used by its walkers, but are
+        # moved with the rest, so they are kept finite
+        walkers = self.replicas[0].walking_particles
+        self.num_of_rows = walkers.size
+        self._blocks: Dict[str, np.ndarray] = {}
+        for name in WalkingParticles._per_walker:
+            values = getattr(walkers, name)
+            block = np.zeros((replicas,) + values.shape, dtype=values.dtype)
+            for i, replica in enumerate(self.replicas):
+                block[i] = getattr(replica.walking_particles, name)
+                setattr(replica.walking_particles, name, block[i])
+            self._blocks[name] = block
+        # Cells close to stuck particles of every replica, with the same
+        # size and bound of step for all of them
+        stuck = self.replicas[0].stuck_particles
+        self.max_step = stuck.max_step
+        self.bitmap_cells = stuck.bitmap_cells
+        self._bitmaps = np.stack(
+            [replica.stuck_particles.bitmap for replica in self.replicas]
+        )
+        for i, replica in enumerate(self.replicas):
+            replica.stuck_particles.bitmap = self._bitmaps[i]
+        self._noise = NoiseBuffer(
+            replicas * self.num_of_rows,
+            NOISE_STEPS,
+            np.random.default_rng(seeds[-1])
+        )
+
+    def _rows(self, name: str) -> np.ndarray:
+        """
+        Returns array of all replicas with rows of all walkers in first
+        axis.
+        """
+        block = self._blocks[name]
+        return block.reshape((-1,) + block.shape[2:])
+
+    def _awake(self) -> Union[slice, np.ndarray]:
+        """
+        Returns rows of walkers of all replicas, which aren't asleep.
+        """
+        if self.config.max_leap <= 1:
+            return slice(None)
+        return np.flatnonzero(self._rows('asleep') == 0)
+
+    def walk(self) -> None:
+        awake = self._awake()
+        # Views of whole arrays, unless some walkers are asleep
+        last_step = self._rows('last_step')[awake]
+        step_len = self._rows('step_len')[awake]
+        update_steps(
+            last_step,
+            step_len,
+            self._noise.take(last_step.shape[0]),
+            self.config.alpha,
+            self.config.beta
+        )
+        if self.config.max_leap > 1:
+            self._rows('last_step')[awake] = last_step
+            self._rows('step_len')[awake] = step_len
+
+    def finish_walk(self) -> None:
+        awake = self._awake()
+        pos = self._rows('pos')[awake]
+        last_step = self._rows('last_step')[awake]
+        clearance = self._rows('clearance')[awake]
+        move_walkers(
+            pos,
+            last_step,
+            self._rows('step_len')[awake],
+            clearance,
+            self.config.radius,
+            self.config.window_size - self.config.radius
+        )
+        if self.config.max_leap > 1:
+            # Walkers were copied, as some of them are asleep
+            self._rows('pos')[awake] = pos
+            self._rows('last_step')[awake] = last_step
+            self._rows('clearance')[awake] = clearance
+
+    def collision_candidates(self) -> np.ndarray:
+        """
+        Returns rows of live, awake walkers of all running replicas, which
+        can collide with stuck particles of their replica during current
+        step, as `StuckParticles.may_collide` does for one replica.
+        """
+        cells = (self._rows('pos') / self.config.cell_size).astype(np.intp)
+        np.clip(cells, 0, self.bitmap_cells - 1, out=cells)
+        replica = np.repeat(
+            np.arange(len(self.running)), self.num_of_rows
+        )
+        may_collide = (
+            self._bitmaps[replica, cells[:, 1], cells[:, 0]] |
+            (self._rows('step_len') > self.max_step)
+        )
+        sizes = [replica.walking_particles.size for replica in self.running]
+        may_collide &= (
+            np.arange(self.num_of_rows) < np.array(sizes)[:, None]
+        ).reshape(-1)
+        if self.config.max_leap > 1:
+            may_collide &= self._rows('asleep') == 0
+        return np.flatnonzero(may_collide)
+
+    def collision_times(self) -> np.ndarray:
+        """
+        Returns times of collision of walkers of running replicas (row `i`
+        for replica `i`) and refreshes their clearances.
+        """
+        rows = self.collision_candidates()
+        owners = (rows // self.num_of_rows).astype(np.intc)
+        candidates_clearance = self._rows('clearance')[rows]
+        if self.config.use_cell_list:
+            candidates_times = cell_lists_collision_times(
+                [replica.stuck_particles.cell_list
+                 for replica in self.running],
+                [replica.stuck_particles.view for replica in self.running],
+                owners,
+                self._rows('pos')[rows],
+                self._rows('last_step')[rows],
+                self.config.threads,
+                candidates_clearance
+            )
+        else:
+            candidates_times = collision_cells_collision_times(
+                [replica.plane.collision_cells for replica in self.running],
+                owners,
+                self._rows('pos')[rows],
+                self._rows('last_step')[rows],
+                self.config.threads,
+                candidates_clearance
+            )
+        self._rows('clearance')[rows] = candidates_clearance
+        times = np.full((len(self.running), self.num_of_rows), 2.0)
+        times.reshape(-1)[rows] = candidates_times
+        return times
+
+    def update(self) -> None:
+        for replica in self.running:
+            replica.num_of_iterations += 1
+
+        self.walk()
+        times = self.collision_times()
+        for i in np.flatnonzero((times <= 1).any(axis=1)):
+            replica = self.running[i]
+            walkers = replica.walking_particles
+            size = walkers.size
+            walkers.is_stuck(replica.stuck_particles, times[i, :size])
+            if walkers.size < size:
+                # Removed walkers leave NaN behind
+                self._blocks['pos'][i, walkers.size:] = walkers.border_u_l
+        self.finish_walk()
+        for replica in self.running:
+            replica.walking_particles.respawn(replica.stuck_particles)
+            replica.walking_particles.leap(replica.stuck_particles)
+            replica.record()
+
+        self._stop_finished()
+
+    def _stop_finished(self) -> None:
+        """
+        Moves walkers and bitmaps of finished replicas out of shared
+        arrays, so they aren't moved anymore, and removes their rows.
+        """
+        finished = [
+            replica.stuck_particles.is_complete() or
+            replica.num_of_iterations >= self.config.max_steps
+            for replica in self.running
+        ]
+        if not any(finished):
+            return
+
+        for replica, is_finished in zip(self.running, finished):
+            if is_finished:
+                walkers = replica.walking_particles
+                for name in WalkingParticles._per_walker:
+                    setattr(walkers, name, getattr(walkers, name).copy())
+                stuck = replica.stuck_particles
+                stuck.bitmap = stuck.bitmap.copy()
+
+        self.running = [
+            replica
+            for replica, is_finished in zip(self.running, finished)
+            if not is_finished
+        ]
+        for name, block in self._blocks.items():
+            block = block[np.logical_not(finished)]
+            for i, replica in enumerate(self.running):
+                walkers = replica.walking_particles
+                setattr(walkers, name, block[i, :walkers.size])
+            self._blocks[name] = block
+        self._bitmaps = self._bitmaps[np.logical_not(finished)]
+        for i, replica in enumerate(self.running):
+            replica.stuck_particles.bitmap = self._bitmaps[i]
+
+    def run(self) -> None:
+        """
+        Updates replicas until all of them are finished, as
+        `Simulation.run` does.
+        """
+        while self.running:
+            self.update()
+
+    def get_data(self) -> List[Dict[str, Union[Vec, float]]]:
+        return [replica.get_data() for replica in self.replicas]
+
+    def save_data(self, out_dir: Optional[Path] = None) -> List[Path]:
+        return [replica.save_data(out_dir) for replica in self.replicas]
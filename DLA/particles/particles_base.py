@@ -5,7 +5,7 @@ from typing import TYPE_CHECKING, Any, Iterator, Tuple, cast
 import numpy as np
 
 from DLA import RGB, WHITE, Vec
-from DLA.config import RADIUS, USE_PYGAME
+from DLA.config import USE_PYGAME, Config
 
 if USE_PYGAME or TYPE_CHECKING:
     from pygame import draw as draw
@@ -15,7 +15,8 @@ if USE_PYGAME or TYPE_CHECKING:
 class ParticlesBase:
     color: RGB = WHITE
 
-    def __init__(self, size: int) -> None:
+    def __init__(self, size: int, config: Config) -> None:
+        self.config = config
         self.pos: np.ndarray = np.empty((size, 2), dtype=np.double)
         self.size = size
 
@@ -42,20 +43,22 @@ class ParticlesBase:
     if USE_PYGAME:
         def draw(self, surface_: surface.Surface) -> None:
             for i in self:
-                if not np.isnan(i[0]):
-                    self.draw_circle(surface_, i, self.color)
+                self.draw_circle(
+                    surface_, i, self.color, self.config.radius
+                )
 
         @staticmethod
         def draw_circle(
             surface_: surface.Surface,
             center: Vec,
-            color: RGB
+            color: RGB,
+            radius: float
         ) -> None:
             draw.circle(
                 surface_,
                 color,
                 cast(Tuple[float, float], center),
-                RADIUS
+                radius
             )
     else:
         def draw(self, surface_: surface.Surface) -> None: ...
@@ -64,6 +67,7 @@ class ParticlesBase:
         def draw_circle(
             surface_: surface.Surface,
             center: Vec,
-            color: RGB
+            color: RGB,
+            radius: float
         ) -> None: ...
     # endregion
@@ -1,35 +1,55 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Iterable, Iterator
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional
 
 import numpy as np
 
 from DLA import GREEN, RGB, Vec, Vec2
-from DLA.config import NUM_OF_PARTICLES, PARTICLE_PLANE_SIZE, RADIUS
-from DLA.utils import get_collision_time
+from DLA.utils import CellList
 
 from .particles_base import ParticlesBase
 
 if TYPE_CHECKING:
-    from DLA.plane.base_plane import BasePlane
+    from DLA.plane.plane import Plane
 
     from .walking_particles import WalkingParticles
 
 
 class StuckParticles(ParticlesBase):
     color: RGB = GREEN
-    _plane: BasePlane
+    _plane: Plane
 
     def __init__(
         self,
         walkers: WalkingParticles,
         start_pos: Vec2,
-        plane: BasePlane
+        plane: Plane
     ) -> None:
-        super().__init__(walkers.size + 1)
+        config = walkers.config
+        super().__init__(walkers.size + walkers.waiting + 1, config)
         self.pos[0] = start_pos
         self.filled = 1
         self._plane = plane
+        # Distance of the furthest stuck particle from the first one
+        self.cluster_radius = 0.0
+        # Sums of positions relative to the first particle and of their
+        # squared lengths, for radius of gyration
+        self._offset_sum = np.zeros(2)
+        self._distance_sq_sum = 0.0
+        # Steps longer than three standard deviations of the step are rare
+        self.max_step = 3 * config.alpha / np.sqrt(1 - config.beta ** 2)
+        # Cells closer than 2 * radius + max_step to any stuck particle
+        self.bitmap_cells = int(np.ceil(config.window_size / config.cell_size))
+        self.bitmap = np.zeros(
+            (self.bitmap_cells, self.bitmap_cells), dtype=np.bool_
+        )
+        self._mark(self.pos[0])
+        self.cell_list: Optional[CellList] = None
+        if config.use_cell_list:
+            self.cell_list = CellList(
+                config.window_size, config.cell_size, config.radius, self.size
+            )
+            self.cell_list.add_point(self.pos[0], 0)
 
     def __iter__(self) -> Iterator[np.ndarray]:
         return iter(self.pos[:self.filled])
@@ -39,17 +59,80 @@ class StuckParticles(ParticlesBase):
         return self.pos[:self.filled]
 
     def does_collide(self, point: Vec, move_vec: Vec) -> float:
-        return get_collision_time(
-            self._plane, PARTICLE_PLANE_SIZE, point, move_vec, RADIUS
+        if self.cell_list is None:
+            return self._plane.collision_time(point, move_vec)
+        return self.collision_times(
+            np.reshape(point, (1, 2)), np.reshape(move_vec, (1, 2))
+        )[0]
+
+    def collision_times(
+        self,
+        points: Vec,
+        move_vecs: Vec,
+        clearances: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Returns times of collision of every point moved by its vector.
+
+        Walkers with `clearances` (lower bound of distance between them and
+        stuck particles, minus 2 * radius) larger than length of their move
+        are skipped. For the rest clearance is refreshed in place.
+        """
+        if self.cell_list is None:
+            return self._plane.collision_times(points, move_vecs, clearances)
+        return self.cell_list.collision_times(
+            self.view, points, move_vecs, self.config.threads, clearances
+        )
+
+    def _mark(self, point: Vec) -> None:
+        reach = 2 * self.config.radius + self.max_step
+        cell_size = self.config.cell_size
+        x_min, y_min = np.clip(
+            np.floor((point - reach) / cell_size), 0, self.bitmap_cells - 1
+        ).astype(int)
+        x_max, y_max = np.clip(
+            np.floor((point + reach) / cell_size), 0, self.bitmap_cells - 1
+        ).astype(int)
+        self.bitmap[y_min:y_max + 1, x_min:x_max + 1] = True
+
+    def may_collide(self, points: Vec, move_lens: np.ndarray) -> np.ndarray:
+        """
+        Returns mask of points, which can collide with stuck particles,
+        when moved by vectors of lengths `move_lens`: points in marked
+        cells of bitmap or with move longer than `max_step`.
+        """
+        with np.errstate(invalid='ignore'):
+            cells = (points / self.config.cell_size).astype(np.intp)
+        np.clip(cells, 0, self.bitmap_cells - 1, out=cells)
+        return (
+            self.bitmap[cells[:, 1], cells[:, 0]] |
+            (move_lens > self.max_step)
         )
 
     def add_stuck(self, new_point: Vec) -> None:
         self.pos[self.filled] = new_point
+        self._mark(self.pos[self.filled])
+        if self.cell_list is not None:
+            self.cell_list.add_point(self.pos[self.filled], self.filled)
         self._plane.add_point(self.filled)
+        self.cluster_radius = max(
+            self.cluster_radius,
+            float(np.hypot(*(self.pos[self.filled] - self.pos[0])))
+        )
+        offset = self.pos[self.filled] - self.pos[0]
+        self._offset_sum += offset
+        self._distance_sq_sum += float(offset @ offset)
         self.filled += 1
 
+    @property
+    def radius_of_gyration(self) -> float:
+        mean = self._offset_sum / self.filled
+        return float(
+            np.sqrt(max(self._distance_sq_sum / self.filled - mean @ mean, 0))
+        )
+
     def is_complete(self) -> bool:
-        return self.filled > NUM_OF_PARTICLES
+        return self.filled > self.config.num_of_particles
 
     @classmethod
     def load_for_render(
@@ -10,6 +10,105 @@ from DLA import Vec
 def random_in_range(
         a: float,
         b: float,
-        shape: Union[Vec, Tuple[float, ...]]
+        shape: Union[Vec, Tuple[float, ...]],
+        rng: np.random.Generator
 ) -> np.ndarray:
-    return (b - a) * np.random.random_sample(shape) + a
+    return (b - a) * rng.random(shape) + a
+
+
+class NoiseBuffer:
+    """
+    Standard normal noise drawn many steps at a time into one reusable
+    buffer, from which every step takes a view.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        steps: int,
+        rng: np.random.Generator
+    ) -> None:
+        self._noise = np.empty(2 * max(size, 1) * steps)
+        self._used = self._noise.size
+        self._rng = rng
+
+    def take(self, size: int) -> np.ndarray:
+        end = self._used + 2 * size
+        if end > self._noise.size:
+            self._rng.standard_normal(out=self._noise)
+            self._used, end = 0, 2 * size
+        noise = self._noise[self._used:end].reshape(size, 2)
+        self._used = end
+        return noise
+
+
+class LeapTable:
+    """
+    Moments of autoregressive walk
+    `step[t] = beta * step[t - 1] + alpha * noise[t]`, advanced `k` steps
+    at once, for `k` in range `[1, max_leap]`.
+
+    Each coordinate of total displacement after `k` steps and of the last
+    of these steps is a joint Gaussian, which mean depends only on the
+    step taken before the leap.
+    """
+
+    def __init__(self, alpha: float, beta: float, max_leap: int) -> None:
+        powers = beta ** np.arange(max_leap + 1, dtype=np.double)
+        # Influence of a noise on displacement, `m` steps before the end
+        gains = np.cumsum(powers[:-1])
+        partial_sums = np.cumsum(powers[1:])
+
+        var_disp = alpha ** 2 * np.cumsum(gains ** 2)
+        var_step = alpha ** 2 * np.cumsum(powers[:-1] ** 2)
+        cov = alpha ** 2 * np.cumsum(gains * powers[:-1])
+
+        # Index `k` is used for leap of `k` steps
+        self.disp_mean = np.concatenate(([0.], partial_sums))
+        self.step_mean = powers
+        self.l11 = np.concatenate(([0.], np.sqrt(var_disp)))
+        self.l21 = np.concatenate(([0.], cov / self.l11[1:]))
+        self.l22 = np.concatenate(
+            ([0.], np.sqrt(np.maximum(var_step - self.l21[1:] ** 2, 0)))
+        )
+
+        # Bounds of mean and standard deviation of displacement at any of
+        # first `k` steps, used for estimating how far walker can get
+        self.max_mean = np.maximum.accumulate(np.abs(self.disp_mean))
+        self.max_std = np.maximum.accumulate(self.l11)
+
+    def max_leap(
+        self,
+        last_step: np.ndarray,
+        distance: np.ndarray,
+        sigmas: float
+    ) -> np.ndarray:
+        """
+        Returns the longest leaps, during which no coordinate of walker
+        moves further than `distance`, unless it deviates from its mean by
+        more than `sigmas` standard deviations.
+        """
+        # Mean is bounded by its bound for the longest leap, so only
+        # the deviation depends on length of the leap
+        reach = distance - np.abs(last_step).max(axis=1) * self.max_mean[-1]
+        # NaN marks particle, which is already stuck
+        reach[np.isnan(reach)] = -np.inf
+        return np.searchsorted(sigmas * self.max_std, reach) - 1
+
+    def sample(
+        self,
+        k: np.ndarray,
+        last_step: np.ndarray,
+        rng: np.random.Generator
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns displacement after `k` steps and last of these steps.
+        """
+        z1, z2 = rng.standard_normal((2, k.shape[0], 2))
+        k = k[:, None]
+        disp = self.disp_mean[k] * last_step + self.l11[k] * z1
+        step = (
+            self.step_mean[k] * last_step +
+            self.l21[k] * z1 + self.l22[k] * z2
+        )
+        return disp, step
@@ -1,53 +1,242 @@
 from __future__ import annotations
 
-from typing import Final, Iterable
+from heapq import heappop, heappush
+from typing import Final, Iterable, List, Optional, Tuple, Union
 
 import numpy as np
 from numpy import NaN
 
 from DLA import Vec
-from DLA.config import (ALPHA, BETA, PUSH_OUT_TRIES, RADIUS, REGENERATE_AFTER,
-                        WINDOW_SIZE)
+from DLA.config import Config
+from DLA.utils import move_walkers, update_steps
 
 from .particles_base import ParticlesBase
 from .stuck_particles import StuckParticles
-from .utils import random_in_range
+from .utils import LeapTable, NoiseBuffer, random_in_range
 
-BORDER_U_L: Final[float] = RADIUS
-BORDER_D_R: Final[float] = WINDOW_SIZE - RADIUS
+# Number of steps, for which noise is drawn at once
+NOISE_STEPS: Final[int] = 32
 
 
 class WalkingParticles(ParticlesBase):
-    def __init__(self, size: int) -> None:
-        super().__init__(size)
-        self.pos[:, :] = random_in_range(BORDER_U_L, BORDER_D_R, (size, 2))
+    # Live walkers are always first `size` rows of these arrays
+    _per_walker: Tuple[str, ...] = (
+        'pos', 'last_step', 'step_len', 'clearance', 'asleep', 'leap_len',
+        'leap_radius'
+    )
+
+    def __init__(self, size: int, config: Config) -> None:
+        # Walkers not launched yet, they replace the ones that got stuck
+        self.waiting = 0
+        if config.spawn_on_circle:
+            self.waiting = max(size - config.in_flight, 0)
+            size -= self.waiting
+        super().__init__(size, config)
+        self.rng = np.random.default_rng(config.seed)
+        self.border_u_l = config.radius
+        self.border_d_r = config.window_size - config.radius
+        if not config.spawn_on_circle:
+            self.pos[:, :] = random_in_range(
+                self.border_u_l, self.border_d_r, (size, 2), self.rng
+            )
         self.last_step: np.ndarray = np.zeros((size, 2))
-        self.last_regen = 0
+        self.step_len: np.ndarray = np.zeros(size)
+        self._noise = NoiseBuffer(size, NOISE_STEPS, self.rng)
+        # Lower bound of distance to stuck particles minus 2 * radius,
+        # walkers don't look for collisions until they move that far
+        self.clearance: np.ndarray = np.zeros(size)
+        # Walkers, which took a leap, skip next `asleep` updates. Their
+        # position and step are updated after `leap_len` updates or when
+        # stuck particle appears closer than `leap_radius` + 2 * radius.
+        self.asleep: np.ndarray = np.zeros(size, dtype=np.intp)
+        self.leap_len: np.ndarray = np.zeros(size, dtype=np.intp)
+        self.leap_radius: np.ndarray = np.zeros(size)
+        self.leaps: Optional[LeapTable] = None
+        if config.max_leap > 1:
+            self.leaps = LeapTable(config.alpha, config.beta, config.max_leap)
+        if config.spawn_on_circle:
+            self._launch(np.arange(size), np.array(config.start_pos), 0.0)
 
     @classmethod
-    def load_for_render(cls, particles: Iterable[Vec]) -> WalkingParticles:
-        obj = cls(0)
+    def load_for_render(
+        cls,
+        particles: Iterable[Vec],
+        config: Config
+    ) -> WalkingParticles:
+        obj = cls(0, config)
         obj.pos = np.array(particles)
         obj.size = obj.pos.shape[0]
         return obj
 
+    def _awake(self) -> Union[slice, np.ndarray]:
+        if self.leaps is None:
+            return slice(None)
+        return np.flatnonzero(self.asleep == 0)
+
     def walk(self) -> None:
-        self.last_step = (
-            BETA * self.last_step +
-            ALPHA * np.random.standard_normal((self.size, 2))
+        awake = self._awake()
+        # Views of whole arrays, unless some walkers are asleep
+        last_step = self.last_step[awake]
+        step_len = self.step_len[awake]
+        update_steps(
+            last_step,
+            step_len,
+            self._noise.take(last_step.shape[0]),
+            self.config.alpha,
+            self.config.beta
         )
+        if self.leaps is not None:
+            self.last_step[awake] = last_step
+            self.step_len[awake] = step_len
 
     def finish_walk(self) -> None:
-        self.pos += self.last_step
-        out_of_main_plain = ~((BORDER_U_L < self.pos) &
-                              (self.pos < BORDER_D_R))
-        self.last_step[out_of_main_plain] *= -1
-        np.clip(
-            self.pos,
-            BORDER_U_L,
-            BORDER_D_R,
-            out=self.pos
+        awake = self._awake()
+        pos = self.pos[awake]
+        last_step = self.last_step[awake]
+        clearance = self.clearance[awake]
+        move_walkers(
+            pos,
+            last_step,
+            self.step_len[awake],
+            clearance,
+            self.border_u_l,
+            self.border_d_r
+        )
+        if self.leaps is not None:
+            # Walkers were copied, as some of them are asleep
+            self.pos[awake] = pos
+            self.last_step[awake] = last_step
+            self.clearance[awake] = clearance
+
+    def leap(self, other: StuckParticles) -> None:
+        """
+        Lets walkers far from stuck particles and walls take many steps at
+        once, while the rest of walkers takes them one by one.
+
+        Every position during the leap stays in a square around the
+        starting one, which doesn't touch walls, the circle enclosing
+        stuck particles nor the kill circle, so walker can't collide,
+        bounce nor be launched again, unless it
+        deviates more than `leap_sigmas` standard deviations from its
+        expected path.
+        """
+        if self.leaps is None:
+            return
+
+        np.maximum(self.asleep - 1, 0, out=self.asleep)
+        woken = np.flatnonzero((self.leap_len > 0) & (self.asleep == 0))
+        if woken.size:
+            self._finish_leap(woken)
+
+        awake = np.flatnonzero(self.asleep == 0)
+        pos = self.pos[awake]
+        to_center = np.hypot(*(pos - other[0]).T)
+        to_cluster = (
+            to_center - other.cluster_radius - 2 * self.config.radius
+        ) / np.sqrt(2)
+        to_wall = np.minimum(
+            pos - self.border_u_l, self.border_d_r - pos
+        ).min(axis=1)
+        distance = np.minimum(to_cluster, to_wall)
+        if self.config.spawn_on_circle:
+            to_kill = (self._kill_radius(other) - to_center) / np.sqrt(2)
+            np.minimum(distance, to_kill, out=distance)
+        steps = self.leaps.max_leap(
+            self.last_step[awake], distance, self.config.leap_sigmas
+        )
+
+        leaping = steps > 1
+        awake = awake[leaping]
+        self.asleep[awake] = self.leap_len[awake] = steps[leaping]
+        self.leap_radius[awake] = distance[leaping] * np.sqrt(2)
+
+    def _launch(
+        self,
+        walkers: np.ndarray,
+        center: Vec,
+        cluster_radius: float
+    ) -> None:
+        """
+        Places walkers at random on launch circle around `center`, as if
+        they have just been created.
+        """
+        angle = random_in_range(0, 2 * np.pi, walkers.size, self.rng)
+        self.pos[walkers] = np.clip(
+            center + (cluster_radius + self.config.launch_margin) *
+            np.stack((np.cos(angle), np.sin(angle)), axis=1),
+            self.border_u_l,
+            self.border_d_r
+        )
+        self.last_step[walkers] = 0
+        self.step_len[walkers] = 0
+        self.clearance[walkers] = 0
+
+    def _kill_radius(self, other: StuckParticles) -> float:
+        return self.config.kill_factor * (
+            other.cluster_radius + self.config.launch_margin
+        )
+
+    def respawn(self, other: StuckParticles) -> None:
+        """
+        Puts walkers, which wandered beyond kill circle, back on launch
+        circle. Sleeping walkers are checked after their leap ends.
+        """
+        if not self.config.spawn_on_circle:
+            return
+
+        far = np.hypot(*(self.pos - other[0]).T) > self._kill_radius(other)
+        if self.leaps is not None:
+            far &= self.asleep == 0
+        far = np.flatnonzero(far)
+        if far.size:
+            self._launch(far, other[0], other.cluster_radius)
+
+    def _finish_leap(self, walkers: np.ndarray) -> None:
+        """
+        Moves walkers by steps of their leaps, that have already passed.
+        """
+        steps = self.leap_len[walkers] - self.asleep[walkers]
+        disp, step = self.leaps.sample(
+            steps, self.last_step[walkers], self.rng
+        )
+        pos = self.pos[walkers] + disp
+        # Rare leaps beyond the safe square are stopped on walls, as single
+        # steps are, and can end close to stuck particles
+        low = pos <= self.border_u_l
+        high = pos >= self.border_d_r
+        pos[low] = self.border_u_l
+        pos[high] = self.border_d_r
+        step[low | high] *= -1
+        self.pos[walkers] = pos
+        self.last_step[walkers] = step
+        escaped = np.abs(disp).max(axis=1) > (
+            self.leap_radius[walkers] / np.sqrt(2)
         )
+        self.clearance[walkers] = np.where(
+            escaped, 0, self.clearance[walkers] - np.hypot(*disp.T)
+        )
+        self.asleep[walkers] = self.leap_len[walkers] = 0
+
+    def _wake_up(self, new_point: Vec) -> np.ndarray:
+        """
+        Interrupts leaps, which could end up on newly stuck particle.
+        Interrupted walkers take their step in current update.
+        """
+        sleeping = np.flatnonzero(self.asleep)
+        close = np.hypot(*(self.pos[sleeping] - new_point).T) < (
+            self.leap_radius[sleeping] + 2 * self.config.radius
+        )
+        woken = sleeping[close]
+        if not woken.size:
+            return woken
+
+        self._finish_leap(woken)
+        self.last_step[woken] = (
+            self.config.beta * self.last_step[woken] +
+            self.config.alpha * self.rng.standard_normal((woken.size, 2))
+        )
+        self.step_len[woken] = np.hypot(*self.last_step[woken].T)
+        return woken
 
     def try_to_push_out(
         self,
@@ -56,7 +245,7 @@ class WalkingParticles(ParticlesBase):
         time: float,
         other: StuckParticles
     ) -> None:
-        for _ in range(PUSH_OUT_TRIES):
+        for _ in range(self.config.push_out_tries):
             free_particle = free_particle + last_step * time
             time = other.does_collide(free_particle, last_step)
             if time >= 0:
@@ -73,39 +262,112 @@ class WalkingParticles(ParticlesBase):
     ) -> None:
         other.add_stuck(point + step * time)
 
-    def _is_stuck(self, other: StuckParticles) -> bool:
-        for i, v in enumerate(self.pos):
-            if not np.isnan(v[0]):
-                t = other.does_collide(v, self.last_step[i])
-                if t < 0:
-                    self.try_to_push_out(v, self.last_step[i], t, other)
-                    self[i] = NaN
-                    return True
-                elif t <= 1:
-                    self.pass_to_stuck(
-                        v, self.last_step[i], t, other
-                    )
-                    self[i] = NaN
-                    return True
-        return False
-
-    def is_stuck(self, other: StuckParticles) -> None:
-        # * replacement for tail recursion
-        while self._is_stuck(other):
-            pass
-
-        self.regenerate_population()
-
-    def regenerate_population(self):
-        if self.last_regen >= REGENERATE_AFTER:
-            mask = ~np.isnan(self.pos[:, 0])
-            self.pos = self.pos[mask]
-            self.last_step = self.last_step[mask]
-            self.last_regen = -1
-            self.size = self.pos.shape[0]
-        self.last_regen += 1
+    def _collision_times(
+        self,
+        walkers: np.ndarray,
+        times: np.ndarray,
+        other: StuckParticles
+    ) -> None:
+        clearance = self.clearance[walkers]
+        times[walkers] = other.collision_times(
+            self.pos[walkers], self.last_step[walkers], clearance
+        )
+        self.clearance[walkers] = clearance
+
+    def collision_candidates(self, other: StuckParticles) -> np.ndarray:
+        """
+        Returns indices of awake walkers, which can collide with stuck
+        particles during current step.
+        """
+        may_collide = other.may_collide(self.pos, self.step_len)
+        if self.leaps is not None:
+            may_collide &= self.asleep == 0
+        return np.flatnonzero(may_collide)
+
+    def is_stuck(
+        self,
+        other: StuckParticles,
+        times: Optional[np.ndarray] = None
+    ) -> None:
+        """
+        Makes stuck every walker colliding during current step, in order of
+        their indices. After each new stuck particle, times are updated only
+        for walkers, which can reach it.
+
+        Times of collision of candidates can be passed in `times` (`2.0`
+        for other walkers), when they were computed for many simulations at
+        once. They are modified in place.
+        """
+        if times is None:
+            times = np.full(self.size, 2.0)
+            self._collision_times(
+                self.collision_candidates(other), times, other
+            )
+        # Sorted list is a valid heap
+        colliding = np.flatnonzero(times <= 1).tolist()
+        stuck: List[int] = []
+        diameter = 2 * self.config.radius
+
+        while colliding:
+            i = heappop(colliding)
+            stuck.append(i)
+            v = self.pos[i]
+            t = times[i]
+            if t < 0:
+                self.try_to_push_out(v, self.last_step[i], t, other)
+            else:
+                self.pass_to_stuck(v, self.last_step[i], t, other)
+            # Removed after all collisions are resolved, so indices in
+            # `colliding` stay valid
+            self[i] = NaN
+            times[i] = 2.0
+
+            new_point = other[other.filled - 1]
+            distance = np.hypot(*(self.pos - new_point).T)
+            np.minimum(
+                self.clearance, distance - diameter, out=self.clearance
+            )
+            affected = distance <= diameter + self.step_len + 1e-6
+            if self.leaps is not None:
+                affected &= self.asleep == 0
+                affected[self._wake_up(new_point)] = True
+            affected = np.flatnonzero(affected)
+
+            not_colliding = times[affected] > 1
+            self._collision_times(affected, times, other)
+            for j in affected[not_colliding & (times[affected] <= 1)]:
+                heappush(colliding, int(j))
+
+        if not stuck:
+            return
+        dead = np.array(stuck)
+        if self.waiting:
+            # Stuck walkers are launched again as new ones
+            relaunched = dead[:self.waiting]
+            self.waiting -= relaunched.size
+            self._launch(relaunched, other[0], other.cluster_radius)
+            dead = dead[relaunched.size:]
+        self.remove(dead)
+
+    def remove(self, walkers: np.ndarray) -> None:
+        """
+        Removes walkers by moving last live walkers into their rows and
+        shrinking views of per walker arrays, without copying the rest.
+        """
+        size = self.size - walkers.size
+        holes = walkers[walkers < size]
+        in_tail = np.ones(self.size - size, dtype=np.bool_)
+        in_tail[walkers[walkers >= size] - size] = False
+        moved = np.flatnonzero(in_tail) + size
+        for name in self._per_walker:
+            values = getattr(self, name)
+            values[holes] = values[moved]
+            setattr(self, name, values[:size])
+        self.size = size
 
     def update(self, other: StuckParticles) -> None:
         self.walk()
         self.is_stuck(other)
         self.finish_walk()
+        self.respawn(other)
+        self.leap(other)
@@ -1,4 +1,5 @@
 from .dimension import Dimension
+from .flat_plane import FlatPlane
 from .plane import Plane
 
-__all__ = ['Dimension', 'Plane']
+__all__ = ['Dimension', 'FlatPlane', 'Plane']
@@ -6,9 +6,11 @@ from typing import (TYPE_CHECKING, Generator, Iterable, List, Optional, Tuple,
 import numpy as np
 
 from DLA import LIGHT_GRAY, Vec2
-from DLA.config import RADIUS, USE_PYGAME
+from DLA.config import USE_PYGAME
 from DLA.particles import StuckParticles, WalkingParticles
-from DLA.utils import circle_in_sub_plane, is_in_circle, one_sub_plane_coords
+from DLA.plane.box_counts import BoxCounts
+from DLA.utils import (CollisionCells, circle_in_sub_plane, is_in_circle,
+                       one_sub_plane_coords)
 
 if USE_PYGAME or TYPE_CHECKING:
     import pygame
@@ -20,10 +22,20 @@ class BasePlane:
     _stuck_points: StuckParticles
     _walking_points: WalkingParticles
     _new_plane_type: Type[BasePlane]
+    # Shared by all planes of the tree, set by parent plane
+    box_counts: BoxCounts
+    collision_cells: Optional[CollisionCells] = None
 
     can_be_full: bool = True
 
-    def __init__(self, start: Vec2, size: float) -> None:
+    def __init__(
+        self,
+        start: Vec2,
+        size: float,
+        stuck_points: StuckParticles
+    ) -> None:
+        self._stuck_points = stuck_points
+        self.config = stuck_points.config
         self.start_pos = np.array(start, dtype=np.double)
         self.size = size
         self._init_pygame(start, size)
@@ -41,13 +53,16 @@ class BasePlane:
                 self.start_pos,
                 self._stuck_points[point],
                 self.size,
-                RADIUS
+                self.config.radius
         ):
             self.set_full()
             return None
 
         sub_planes = circle_in_sub_plane(
-            self.start_pos, self._stuck_points[point], self.size, RADIUS
+            self.start_pos,
+            self._stuck_points[point],
+            self.size,
+            self.config.radius
         )
 
         self.add_sub_planes(sub_planes)
@@ -57,10 +72,30 @@ class BasePlane:
     def add_sub_planes(self, planes: Iterable[int]) -> None:
         for i in planes:
             if not self._sub_planes[i]:
-                self._sub_planes[i] = self._new_plane_type(
+                sub_plane = self._new_plane_type(
                     one_sub_plane_coords(self.start_pos, self.size, i),
-                    self.size / 2
+                    self.size / 2,
+                    self._stuck_points
                 )
+                sub_plane.box_counts = self.box_counts
+                sub_plane.collision_cells = self.collision_cells
+                self.box_counts.add_boxes(sub_plane.size)
+                self._sub_planes[i] = sub_plane
+
+    def remove_boxes(self) -> None:
+        """
+        Removes boxes of this plane and all its sub planes from box counts.
+        """
+        if self.full:
+            self.box_counts.add_full_box(self.size, -1)
+            return
+
+        self.box_counts.add_boxes(self.size / 2, -len(self))
+        if self.size == self.config.second_min_box_size:
+            return
+
+        for i in self:
+            i.remove_boxes()
 
     def add_point(self, point: int) -> None:
         sub_planes = self._add_point(point)
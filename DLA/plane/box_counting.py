@@ -0,0 +1,360 @@
+from __future__ import annotations
+
+from itertools import chain
+from typing import TYPE_CHECKING, Any, Dict, Final, List, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from DLA.config import Config
+
+# Offsets of sub planes of box, in sizes of sub plane, in order used by
+# planes
+_SUB_X = np.array([0, 1, 0, 1])
+_SUB_Y = np.array([0, 0, 1, 1])
+# Number of pairs of box and particle divided at once, bigger sets are
+# split between boxes, so memory used doesn't grow with size of cluster
+MAX_PAIRS: Final[int] = 1 << 12
+
+
+def _nearest(
+    x: np.ndarray,
+    y: np.ndarray,
+    size: float,
+    px: np.ndarray,
+    py: np.ndarray
+) -> np.ndarray:
+    """
+    Returns squared distances between particles and the nearest points of
+    squares, as in `circle_square_collision`.
+    """
+    dx = x - px
+    np.maximum(dx, px - (x + size), out=dx)
+    np.maximum(dx, 0, out=dx)
+    dy = y - py
+    np.maximum(dy, py - (y + size), out=dy)
+    np.maximum(dy, 0, out=dy)
+    dx *= dx
+    dy *= dy
+    dx += dy
+    return dx
+
+
+def _furthest(
+    x: np.ndarray,
+    y: np.ndarray,
+    size: float,
+    px: np.ndarray,
+    py: np.ndarray
+) -> np.ndarray:
+    """
+    Returns squared distances between particles and the furthest corners
+    of squares, as in `is_in_circle`.
+    """
+    dx = np.abs(x - px)
+    np.maximum(dx, np.abs((x + size) - px), out=dx)
+    dy = np.abs(y - py)
+    np.maximum(dy, np.abs((y + size) - py), out=dy)
+    dx *= dx
+    dy *= dy
+    dx += dy
+    return dx
+
+
+def _planes(
+    points: np.ndarray,
+    radius: float,
+    window_size: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns pairs of main plane or its neighbour, in integer coordinates
+    of 3x3 grid of planes starting at `(-window_size, -window_size)`, and
+    particle added to it, as in `check_particle_outside_plane`.
+    """
+    px, py = points[:, 0], points[:, 1]
+    # Particles touching square [2.2 * radius, window_size] aren't added to
+    # neighbours
+    start = 2.2 * radius
+    outside = _nearest(
+        np.full_like(px, start), np.full_like(py, start),
+        window_size - start, px, py
+    ) >= radius * radius
+
+    grid_x, grid_y = np.divmod(np.arange(9), 3)
+    is_main = (grid_x == 1) & (grid_y == 1)
+    added = (_nearest(
+        (grid_x[None, :] - 1) * window_size,
+        (grid_y[None, :] - 1) * window_size,
+        window_size, px[:, None], py[:, None]
+    ) < radius * radius) & outside[:, None]
+    added[:, is_main] = True
+
+    particle, plane = np.nonzero(added)
+    return grid_x[plane], grid_y[plane], particle
+
+
+def _split(
+    box: np.ndarray,
+    *pairs: np.ndarray
+) -> List[Tuple[np.ndarray, ...]]:
+    """
+    Splits pairs of box and particle in two parts with about the same
+    number of pairs, without separating pairs of the same box. Returns
+    empty list for pairs of single box.
+    """
+    pairs_before = np.cumsum(np.bincount(box))
+    middle = min(
+        int(np.searchsorted(pairs_before, box.size // 2)) + 1,
+        pairs_before.shape[0] - 1
+    )
+    if not middle:
+        return []
+    first = box < middle
+    second = ~first
+    return [
+        (box[first], *(values[first] for values in pairs)),
+        (box[second] - middle, *(values[second] for values in pairs)),
+    ]
+
+
+def _boxes(
+    points: np.ndarray,
+    radius: float,
+    window_size: float,
+    level: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns pairs of box of size `window_size / 2 ** level`, in integer
+    coordinates, and particle colliding with it, for boxes of planes
+    particles were added to.
+    """
+    box_x, box_y, particle = _planes(points, radius, window_size)
+    if not level:
+        return box_x, box_y, particle
+
+    per_plane = 1 << level
+    size = window_size / per_plane
+    # One more box on both sides, in case of rounding of first box
+    span = np.arange(int(2 * radius / size) + 4) - 1
+    first_x = np.floor(
+        (points[particle, 0] - radius) / size
+    ).astype(np.int64) - (box_x - 1) * per_plane
+    first_y = np.floor(
+        (points[particle, 1] - radius) / size
+    ).astype(np.int64) - (box_y - 1) * per_plane
+    shape = (particle.size, span.size, span.size)
+    x = np.broadcast_to(first_x[:, None, None] + span[:, None], shape)
+    y = np.broadcast_to(first_y[:, None, None] + span, shape)
+    inside = (x >= 0) & (x < per_plane) & (y >= 0) & (y < per_plane)
+    x = x[inside] + np.broadcast_to(
+        (box_x * per_plane)[:, None, None], shape
+    )[inside]
+    y = y[inside] + np.broadcast_to(
+        (box_y * per_plane)[:, None, None], shape
+    )[inside]
+    particle = np.broadcast_to(particle[:, None, None], shape)[inside]
+
+    hit = _nearest(
+        x * size - window_size, y * size - window_size, size,
+        points[particle, 0], points[particle, 1]
+    ) < radius * radius
+    return x[hit], y[hit], particle[hit]
+
+
+def _count(
+    points: np.ndarray,
+    radius: float,
+    box_size: np.ndarray,
+    level: int,
+    box_x: np.ndarray,
+    box_y: np.ndarray,
+    particle: np.ndarray
+) -> np.ndarray:
+    """
+    Counts sub boxes of boxes `(box_x, box_y)` of size
+    `box_size[level - 1]`, paired with particles colliding with them.
+    Returns number of boxes of every size, zero for sizes above `level`.
+    """
+    levels = box_size.shape[0]
+    window_size = 2 * box_size[0]
+    r_squared = radius * radius
+    num_of_boxes = np.zeros(levels, dtype=np.int64)
+    in_full_box = 4 ** np.arange(1, levels + 1, dtype=np.int64)
+    px_all = np.ascontiguousarray(points[:, 0], dtype=np.double)
+    py_all = np.ascontiguousarray(points[:, 1], dtype=np.double)
+
+    # Boxes, which aren't full, paired with particles colliding with them,
+    # by level of their sub boxes. Boxes are numbered from 0 in every item,
+    # so sub boxes of box `i` are `4 * i` to `4 * i + 3`. Boxes in
+    # different items are different, so they are counted separately.
+    size = 2 * box_size[level] if level < levels else 0
+    box = np.unique(
+        box_x * (3 << level) + box_y, return_inverse=True
+    )[1].reshape(-1)
+    work = [(
+        level, box, particle,
+        box_x * size - window_size, box_y * size - window_size
+    )]
+    while work:
+        level, box, particle, x, y = work.pop()
+        if level == levels or not box.size:
+            continue
+        if box.size > MAX_PAIRS:
+            halves = _split(box, particle, x, y)
+            if halves:
+                work.extend((level, *half) for half in halves)
+                continue
+
+        size = box_size[level]
+        # Coordinates of sub boxes are exact, as in planes
+        sub_x = x[:, None] + size * _SUB_X
+        sub_y = y[:, None] + size * _SUB_Y
+        px = px_all[particle][:, None]
+        py = py_all[particle][:, None]
+        hit = np.flatnonzero(
+            _nearest(sub_x, sub_y, size, px, py) < r_squared
+        )
+        pair = hit >> 2
+        sub = 4 * box[pair] + (hit & 3)
+
+        is_open = np.zeros(4 * (int(box.max()) + 1), dtype=np.bool_)
+        is_open[sub] = True
+        num_of_boxes[level] += np.count_nonzero(is_open)
+        if level + 1 == levels:
+            continue
+
+        full = _furthest(
+            sub_x.reshape(-1)[hit], sub_y.reshape(-1)[hit], size,
+            px_all[particle[pair]], py_all[particle[pair]]
+        ) <= r_squared
+        is_full = np.zeros_like(is_open)
+        is_full[sub[full]] = True
+        num_of_boxes[level + 1:] += \
+            np.count_nonzero(is_full) * in_full_box[:levels - level - 1]
+
+        is_open &= ~is_full
+        keep = is_open[sub]
+        hit, sub = hit[keep], sub[keep]
+        work.append((
+            level + 1,
+            (np.cumsum(is_open) - 1)[sub],
+            particle[hit >> 2],
+            sub_x.reshape(-1)[hit],
+            sub_y.reshape(-1)[hit],
+        ))
+
+    return num_of_boxes
+
+
+def count_boxes(
+    points: np.ndarray,
+    radius: float,
+    window_size: float,
+    min_box_size: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns sizes of boxes, from `window_size / 2` down to `min_box_size`,
+    and number of boxes of every size, which planes would have, if
+    particles `points` were added to them. Computed from positions of
+    particles alone, level by level.
+
+    Box is counted, when any particle added to it collides with it. Box
+    inside circle of any particle is full: all its sub boxes are counted
+    without dividing it further.
+    """
+    levels = int(round(np.log2(window_size / min_box_size)))
+    box_size = window_size / 2 ** np.arange(1, levels + 1)
+    return box_size, _count(
+        points, radius, box_size, 0, *_planes(points, radius, window_size)
+    )
+
+
+class FineBoxCounts:
+    """
+    Number of boxes smaller than `cutoff_box_size`, down to
+    `min_box_size`, for planes which aren't divided below cutoff.
+
+    Boxes are counted from positions of stuck particles. Only boxes of
+    cutoff size touched by particles stuck since previous count are
+    counted again, with all particles touching them, so overlapping
+    particles are counted correctly. Particles touching every box of
+    cutoff size are kept, so older particles aren't paired with boxes
+    again.
+    """
+
+    def __init__(self, config: Config) -> None:
+        self.radius = config.radius
+        self.window_size = config.window_size
+        self.level = int(round(
+            np.log2(config.window_size / config.cutoff_box_size)
+        ))
+        levels = int(round(
+            np.log2(config.window_size / config.min_box_size)
+        ))
+        self.box_size = config.window_size / 2 ** np.arange(1, levels + 1)
+        self.num_of_boxes = np.zeros(levels, dtype=np.int64)
+        # Number of particles already counted
+        self._counted = 0
+        # Boxes of cutoff size in 3x3 grid of planes, numbered by rows
+        self._row = 3 << self.level
+        self._touching: Dict[int, List[int]] = {}
+
+    def _pairs(
+        self,
+        box: np.ndarray,
+        particles: List[List[int]]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        lengths = [len(i) for i in particles]
+        box = np.repeat(box, lengths)
+        particle = np.fromiter(
+            chain.from_iterable(particles), dtype=np.int64,
+            count=sum(lengths)
+        )
+        return box // self._row, box % self._row, particle
+
+    def update(self, points: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Counts boxes changed by particles added to the end of `points` and
+        returns sizes of boxes smaller than cutoff and their numbers.
+        """
+        if self.level < self.box_size.shape[0] and \
+                points.shape[0] > self._counted:
+            box_x, box_y, particle = _boxes(
+                points[self._counted:], self.radius, self.window_size,
+                self.level
+            )
+            particle += self._counted
+            box = box_x * self._row + box_y
+            changed = np.unique(box)
+            old = [self._touching.get(i, []) for i in changed.tolist()]
+            old_x, old_y, old_particle = self._pairs(changed, old)
+
+            self.num_of_boxes += _count(
+                points, self.radius, self.box_size, self.level,
+                np.concatenate((old_x, box_x)),
+                np.concatenate((old_y, box_y)),
+                np.concatenate((old_particle, particle))
+            ) - _count(
+                points, self.radius, self.box_size, self.level,
+                old_x, old_y, old_particle
+            )
+            for i, j in zip(box.tolist(), particle.tolist()):
+                self._touching.setdefault(i, []).append(j)
+            self._counted = points.shape[0]
+
+        return (
+            self.box_size[self.level:], self.num_of_boxes[self.level:].copy()
+        )
+
+
+def recount(data: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """
+    Counts boxes again for saved result of simulation.
+    """
+    box_size, num_of_boxes = count_boxes(
+        data['stuck_particles'],
+        data['radius'],
+        data['window_size'],
+        float(np.min(data['box_size']))
+    )
+    return {'box_size': box_size, 'num_of_boxes': num_of_boxes}
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import numpy as np
+
+
+class BoxCounts:
+    """
+    Number of boxes of every size, from `window_size / 2` down to
+    `min_box_size`, which contain stuck particles. Kept up to date by
+    planes, when sub plane is created or plane becomes full, so it's
+    available at any time without walking the tree.
+    """
+
+    def __init__(self, window_size: float, min_box_size: float) -> None:
+        levels = int(round(np.log2(window_size / min_box_size)))
+        self.box_size = window_size / 2 ** np.arange(1, levels + 1)
+        self.num_of_boxes = np.zeros(levels, dtype=np.int64)
+        self._level = {
+            float(size): level for level, size in enumerate(self.box_size)
+        }
+        # Boxes of every smaller size inside full box
+        self._in_full_box = 4 ** np.arange(1, levels + 1, dtype=np.int64)
+
+    def add_boxes(self, size: float, num: int = 1) -> None:
+        self.num_of_boxes[self._level[size]] += num
+
+    def add_full_box(self, size: float, sign: int = 1) -> None:
+        """
+        Adds all boxes inside full box of given size (removes them, when
+        `sign` is `-1`).
+        """
+        level = self._level[size / 2]
+        self.num_of_boxes[level:] += \
+            sign * self._in_full_box[:self.num_of_boxes.shape[0] - level]
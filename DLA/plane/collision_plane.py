@@ -3,7 +3,7 @@ from __future__ import annotations
 from array import array
 
 from DLA import Vec2
-from DLA.config import SECOND_MIN_BOX_SIZE
+from DLA.particles import StuckParticles
 from DLA.plane.fullnes import CanBeFull
 from DLA.plane.indivisible_plane import IndivisiblePlane
 from DLA.plane.sub_planes import SubPlane
@@ -11,16 +11,33 @@ from DLA.plane.sub_planes import SubPlane
 
 class SubPlaneParticlesAndIndivisible(CanBeFull, SubPlane):
     _alt_plane_type = IndivisiblePlane
-    _size_for_alt_plane_type = SECOND_MIN_BOX_SIZE
+
+    @property
+    def _size_for_alt_plane_type(self) -> float:  # type: ignore
+        return self.config.second_min_box_size
 
 
 class CollisionPlane(CanBeFull):
     _new_plane_type = SubPlaneParticlesAndIndivisible
 
-    def __init__(self, start: Vec2, size: float) -> None:
-        super().__init__(start, size)
-        self.parts: array[int] = array('I')
+    def __init__(
+        self,
+        start: Vec2,
+        size: float,
+        stuck_points: StuckParticles
+    ) -> None:
+        super().__init__(start, size, stuck_points)
+        # Coordinates of particles, one after another
+        self.coords: array[float] = array('d')
+        # Cell of `collision_cells` of main plane
+        self.cell = int(self.start_pos[0] / size) + int(
+            self.start_pos[1] / size
+        ) * int(self.config.window_size / size)
 
     def add_point(self, point: int) -> None:
         super().add_point(point)
-        self.parts.append(point)
+        # Stuck particles are kept by `CellList` of main plane
+        if not self.config.use_cell_list:
+            self.coords.extend(self._stuck_points[point])
+            if self.collision_cells is not None:
+                self.collision_cells.update(self.cell, self.coords)
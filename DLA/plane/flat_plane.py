@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, List, Optional, Tuple, cast
+
+import numpy as np
+
+from DLA import LIGHT_GRAY, Vec, Vec2
+from DLA.config import USE_PYGAME
+from DLA.particles import StuckParticles
+from DLA.plane.box_counting import FineBoxCounts
+from DLA.plane.plane import Plane
+from DLA.utils import NodePool
+
+if USE_PYGAME or TYPE_CHECKING:
+    import pygame
+    from pygame import draw
+    from pygame.surface import Surface
+
+
+class FlatPlane(Plane):
+    """
+    Main plane, which keeps whole tree of sub planes (with neighbouring
+    planes) in `NodePool` instead of tree of `BasePlane` objects.
+    """
+
+    def __init__(
+        self,
+        start: Vec2,
+        size: float,
+        stuck_points: StuckParticles
+    ) -> None:
+        super(Plane, self).__init__(start, size, stuck_points)
+        self.neighbours = []
+        config = self.config
+        self.nodes = NodePool(
+            size,
+            config.particle_plane_size,
+            config.second_min_box_size,
+            config.cutoff_box_size,
+            config.radius,
+            not config.use_cell_list
+        )
+        # Shared with `Plane`, so both trees are queried the same way
+        self.collision_cells = self.nodes.cells
+        self.fine_box_counts = FineBoxCounts(config)
+
+    def add_point(self, point: int) -> None:
+        self.nodes.add_point(self._stuck_points[point])
+
+    def collision_time(self, point: Vec, move_vec: Vec) -> float:
+        return self.collision_times(
+            np.reshape(point, (1, 2)), np.reshape(move_vec, (1, 2))
+        )[0]
+
+    def collision_times(
+        self,
+        points: Vec,
+        move_vecs: Vec,
+        clearances: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        return self.nodes.collision_times(
+            points, move_vecs, self.config.threads, clearances
+        )
+
+    def count_boxes(self) -> Tuple[np.ndarray, np.ndarray]:
+        num_of_boxes = self.nodes.count_boxes()
+        box_size = self.size / 2 ** np.arange(1, num_of_boxes.shape[0] + 1)
+        return self._with_fine_boxes(box_size, num_of_boxes)
+
+    # region PyGame stuff
+    if USE_PYGAME:
+        def _draw(self, surface: Surface) -> None:
+            nodes = self.nodes
+            to_draw: List[int] = [0]
+            while to_draw:
+                i = to_draw.pop()
+                size = nodes.size[i]
+                if size <= 2:
+                    continue
+                draw.rect(
+                    surface,
+                    LIGHT_GRAY,
+                    pygame.Rect(
+                        *cast(Tuple[float, float], nodes.start[i]), size, size
+                    ),
+                    1
+                )
+                if nodes.full[i]:
+                    continue
+                # Node `0` is never a sub plane
+                to_draw.extend(j for j in nodes.children[i] if j > 0)
+    # endregion
+
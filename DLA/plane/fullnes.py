@@ -10,6 +10,8 @@ class CanBeFull(BasePlane):
 
     def set_full(self) -> None:
         if not self.full:
+            self.remove_boxes()
+            self.box_counts.add_full_box(self.size)
             self.full = True
             del self._sub_planes
 
@@ -8,7 +8,9 @@ class IndivisiblePlane(CanBeFull):
 
     def add_sub_planes(self, planes: Iterable[int]) -> None:
         for i in planes:
-            self._sub_planes[i] = True
+            if not self._sub_planes[i]:
+                self._sub_planes[i] = True
+                self.box_counts.add_boxes(self.size / 2)
 
     def add_point(self, point: int) -> None:
         sub_planes = self._add_point(point)
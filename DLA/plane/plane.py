@@ -1,30 +1,38 @@
 from __future__ import annotations
 
-from typing import Dict, List, Type
+from typing import Dict, List, Optional, Tuple, Type
 
 import numpy as np
 
 from DLA import Vec, Vec2
-from DLA.config import (NUM_OF_PARTICLES, PARTICLE_PLANE_SIZE, RADIUS,
-                        SECOND_MIN_BOX_SIZE, STARTING_POS, WINDOW_SIZE)
+from DLA.config import Config
 from DLA.exceptions import StopSimulation
 from DLA.particles import StuckParticles, WalkingParticles
 from DLA.plane.base_plane import BasePlane
+from DLA.plane.box_counting import FineBoxCounts
+from DLA.plane.box_counts import BoxCounts
 from DLA.plane.collision_plane import CollisionPlane
 from DLA.plane.fullnes import CanBeFull, CannotBeFull
 from DLA.plane.indivisible_plane import IndivisiblePlane
 from DLA.plane.sub_planes import SubPlane
-from DLA.utils import check_particle_outside_plane, one_sub_plane_coords
+from DLA.utils import (CollisionCells, check_particle_outside_plane,
+                       get_collision_time, one_sub_plane_coords)
 
 
 class SubPlanePlaneAndParticles(CannotBeFull, SubPlane):
     _alt_plane_type = CollisionPlane
-    _size_for_alt_plane_type = PARTICLE_PLANE_SIZE
+
+    @property
+    def _size_for_alt_plane_type(self) -> float:  # type: ignore
+        return self.config.particle_plane_size
 
 
 class NeighbouringPlanes(CanBeFull, SubPlane):
     _alt_plane_type = IndivisiblePlane
-    _size_for_alt_plane_type = SECOND_MIN_BOX_SIZE
+
+    @property
+    def _size_for_alt_plane_type(self) -> float:  # type: ignore
+        return self.config.second_min_box_size
 
 
 class Plane(CannotBeFull):
@@ -43,10 +51,25 @@ class Plane(CannotBeFull):
 
     _new_plane_type: Type[BasePlane] = SubPlanePlaneAndParticles
 
-    def __init__(self, start: Vec2, size: float) -> None:
-        super().__init__(start, size)
+    def __init__(
+        self,
+        start: Vec2,
+        size: float,
+        stuck_points: StuckParticles
+    ) -> None:
+        super().__init__(start, size, stuck_points)
+        # Coordinates of particles of collision planes, updated by them
+        self.collision_cells = CollisionCells(
+            size, self.config.particle_plane_size, self.config.radius
+        )
+        self.box_counts = BoxCounts(
+            self.config.window_size, self.config.cutoff_box_size
+        )
+        self.fine_box_counts = FineBoxCounts(self.config)
         self.neighbours: List[NeighbouringPlanes] = []
         self.setup_neighbours()
+        for neighbour in self.neighbours:
+            neighbour.box_counts = self.box_counts
 
     def setup_neighbours(self) -> None:
         tmp = self.size * 2
@@ -54,18 +77,23 @@ class Plane(CannotBeFull):
             NeighbouringPlanes(
                 one_sub_plane_coords(
                     np.array((-self.size, -self.size), dtype=np.double), tmp, i
-                ), self.size
+                ), self.size, self._stuck_points
             ) for i in range(3)
         )
         self.neighbours.extend(
             NeighbouringPlanes(
                 one_sub_plane_coords(np.zeros(2, dtype=np.double), tmp, i),
-                self.size
+                self.size,
+                self._stuck_points
             ) for i in range(1, 4)
         )
         self.neighbours.extend((
-            NeighbouringPlanes((self.size, -self.size), self.size),
-            NeighbouringPlanes((-self.size, self.size), self.size),
+            NeighbouringPlanes(
+                (self.size, -self.size), self.size, self._stuck_points
+            ),
+            NeighbouringPlanes(
+                (-self.size, self.size), self.size, self._stuck_points
+            ),
         ))
 
     def update(self):
@@ -77,8 +105,8 @@ class Plane(CannotBeFull):
         super().add_point(point)
         colliding = check_particle_outside_plane(
             self._stuck_points[point],
-            RADIUS,
-            WINDOW_SIZE
+            self.config.radius,
+            self.config.window_size
         )
         if not colliding[-1]:
             return
@@ -87,24 +115,65 @@ class Plane(CannotBeFull):
             if collides:
                 neighbour.add_point(point)
 
-    @classmethod
-    def new(cls) -> Plane:
-        obj = cls((0, 0), WINDOW_SIZE)
+    def collision_time(self, point: Vec, move_vec: Vec) -> float:
+        return get_collision_time(
+            self,
+            self.config.particle_plane_size,
+            point,
+            move_vec,
+            self.config.radius
+        )
 
-        BasePlane._walking_points = WalkingParticles(NUM_OF_PARTICLES)
-        BasePlane._stuck_points = StuckParticles(
-            cls._walking_points, STARTING_POS, obj
+    def collision_times(
+        self,
+        points: Vec,
+        move_vecs: Vec,
+        clearances: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        return self.collision_cells.collision_times(
+            points, move_vecs, self.config.threads, clearances
         )
 
+    @classmethod
+    def new(cls, config: Config) -> Plane:
+        walking_points = WalkingParticles(config.num_of_particles, config)
+        stuck_points = StuckParticles(
+            walking_points, config.start_pos, None  # type: ignore
+        )
+        obj = cls((0, 0), config.window_size, stuck_points)
+        obj._walking_points = walking_points
+        stuck_points._plane = obj
+
         # * Method called at initialization of simulation;
         # * There is only one point present
         obj.add_point(0)
 
         return obj
 
+    def count_boxes(self) -> Tuple[np.ndarray, np.ndarray]:
+        return self._with_fine_boxes(
+            self.box_counts.box_size, self.box_counts.num_of_boxes
+        )
+
+    def _with_fine_boxes(
+        self,
+        box_size: np.ndarray,
+        num_of_boxes: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Appends boxes smaller than `cutoff_box_size` to boxes counted by
+        planes.
+        """
+        fine_size, fine_num = self.fine_box_counts.update(
+            self._stuck_points.view
+        )
+        return (
+            np.concatenate((box_size, fine_size)),
+            np.concatenate((num_of_boxes, fine_num)),
+        )
+
     def get_data(self) -> Dict[str, Vec]:
-        nan_mask = np.isnan(self._walking_points.pos)[:, 0]
         return {
             'stuck_particles': self._stuck_points[:self._stuck_points.filled],
-            'walking_particles': self._walking_points.pos[~nan_mask],
+            'walking_particles': self._walking_points.pos,
         }
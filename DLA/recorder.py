@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Final, List, Optional, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from DLA.simulation import Simulation
+
+# Number of records kept in memory, before they are appended to file
+RECORD_CHUNK: Final[int] = 1024
+
+
+class MetricsRecorder:
+    """
+    Records metrics of cluster during simulation: number of stuck
+    particles, radius of gyration, distance of the furthest stuck particle
+    from the first one and number of boxes of every size.
+
+    Records are written to preallocated buffer, which is appended to file
+    every `RECORD_CHUNK` records. File starts with a line with names of
+    columns, followed by rows of little endian doubles.
+
+    Metrics change only, when particles get stuck, so until next one does,
+    last record is repeated instead of counting boxes again.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        box_size: np.ndarray,
+        records: Optional[np.ndarray] = None
+    ) -> None:
+        """
+        Starts file `path`, with `records` made before simulation was
+        resumed, if given.
+        """
+        self.path = path
+        self.columns: List[str] = [
+            'iteration', 'num_of_stuck', 'radius_of_gyration',
+            'cluster_radius'
+        ] + [f'boxes_{size}' for size in box_size]
+        self._buffer = np.empty((RECORD_CHUNK, len(self.columns)), '<f8')
+        self._filled = 0
+        self.last_iteration = -1
+        # Metrics of the last record and number of stuck particles then
+        self._last = np.empty(len(self.columns), '<f8')
+        self._last_stuck = -1
+        with open(path, 'wb') as f:
+            f.write((' '.join(self.columns) + '\n').encode('utf-8'))
+            if records is not None and records.size:
+                f.write(np.ascontiguousarray(records, '<f8').tobytes())
+                self.last_iteration = int(records[-1, 0])
+
+    def record(self, simulation: Simulation) -> None:
+        stuck = simulation.stuck_particles
+        row = self._buffer[self._filled]
+        if stuck.filled != self._last_stuck:
+            self._last[1] = stuck.filled
+            self._last[2] = stuck.radius_of_gyration
+            self._last[3] = stuck.cluster_radius
+            self._last[4:] = simulation.plane.count_boxes()[1]
+            self._last_stuck = stuck.filled
+        row[1:] = self._last[1:]
+        row[0] = simulation.num_of_iterations
+        self.last_iteration = simulation.num_of_iterations
+        self._filled += 1
+        if self._filled == RECORD_CHUNK:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._filled:
+            return
+        with open(self.path, 'ab') as f:
+            f.write(self._buffer[:self._filled].tobytes())
+        self._filled = 0
+
+    def records(self) -> np.ndarray:
+        """
+        Returns all records made so far, also those appended to file.
+        """
+        self.flush()
+        return _read_rows(self.path)[1]
+
+    def close(self, path: Optional[Path] = None) -> Path:
+        """
+        Writes remaining records and moves file to `path`, if given.
+        """
+        self.flush()
+        if path is not None:
+            self.path = self.path.replace(path)
+        return self.path
+
+
+def _read_rows(path: Path) -> Tuple[List[str], np.ndarray]:
+    with open(path, 'rb') as f:
+        columns = f.readline().decode('utf-8').split()
+        data = np.frombuffer(f.read(), '<f8')
+    return columns, data[:data.size - data.size % len(columns)].reshape(
+        -1, len(columns)
+    )
+
+
+def load_metrics(path: Path) -> Dict[str, np.ndarray]:
+    """
+    Reads file written by `MetricsRecorder` into columns. Incomplete last
+    row (left by interrupted write) is skipped.
+    """
+    columns, rows = _read_rows(path)
+    return {name: rows[:, i] for i, name in enumerate(columns)}
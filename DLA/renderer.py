@@ -1,10 +1,11 @@
 from __future__ import annotations
 
-import pickle
 import sys
 from pathlib import Path
 
+from DLA.config import CONFIG
 from DLA.particles import StuckParticles, WalkingParticles
+from DLA.results import load_result
 from DLA.simulation import init_pygame
 
 try:
@@ -16,13 +17,13 @@ except ImportError:
     sys.exit(1)
 
 
-def render(pickle_file: Path, only_stuck: bool = False) -> None:
-    sim_data = pickle.loads(pickle_file.read_bytes())
+def render(result_file: Path, only_stuck: bool = False) -> None:
+    sim_data = load_result(result_file)
     window_size: int = sim_data['window_size']
     surface, clock = init_pygame((window_size, window_size))
 
     walking_particles = WalkingParticles.load_for_render(
-        sim_data['walking_particles']
+        sim_data['walking_particles'], CONFIG
     )
     stuck_particles = StuckParticles.load_for_render(
         walking_particles,
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import json
+import os
+import pickle
+from pathlib import Path
+from typing import IO, Any, Dict, Final, List, Tuple
+
+import numpy as np
+
+PICKLE_SUFFIX: Final[str] = '.pickle'
+COLUMNAR_SUFFIX: Final[str] = '.dla'
+MAGIC: Final[bytes] = b'DLARES01'
+# Arrays start at multiples of this number of bytes
+ALIGNMENT: Final[int] = 64
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    """
+    Writes data to temporary file and moves it to `path`, so interrupted
+    write never leaves incomplete file.
+    """
+    tmp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    tmp_path.replace(path)
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def dumps(data: Dict[str, Any]) -> bytes:
+    """
+    Returns result of simulation in columnar format: `MAGIC`, length of
+    header (4 bytes, little endian) and header in JSON, with values which
+    aren't arrays and layout of arrays, followed by raw, little endian,
+    aligned arrays.
+    """
+    header: Dict[str, Any] = {}
+    layout: Dict[str, Dict[str, Any]] = {}
+    arrays: List[Tuple[int, np.ndarray]] = []
+    offset = 0
+    for name, value in data.items():
+        if not isinstance(value, np.ndarray):
+            header[name] = (
+                value.item() if isinstance(value, np.generic) else value
+            )
+            continue
+        array = np.ascontiguousarray(
+            value, dtype=value.dtype.newbyteorder('<')
+        )
+        layout[name] = {
+            'dtype': array.dtype.str,
+            'shape': list(array.shape),
+            'offset': offset,
+        }
+        arrays.append((offset, array))
+        offset = _aligned(offset + array.nbytes)
+    header['arrays'] = layout
+
+    raw_header = json.dumps(header).encode('utf-8')
+    start = _aligned(len(MAGIC) + 4 + len(raw_header))
+    out = bytearray(start + offset)
+    out[:len(MAGIC)] = MAGIC
+    out[len(MAGIC):len(MAGIC) + 4] = len(raw_header).to_bytes(4, 'little')
+    out[len(MAGIC) + 4:len(MAGIC) + 4 + len(raw_header)] = raw_header
+    for offset, array in arrays:
+        out[start + offset:start + offset + array.nbytes] = array.tobytes()
+    return bytes(out)
+
+
+def _header_length(prefix: bytes) -> int:
+    """
+    Returns length of header from first bytes of columnar result.
+    """
+    if prefix[:len(MAGIC)] != MAGIC:
+        raise ValueError('Data is not a columnar result')
+    return int.from_bytes(prefix[len(MAGIC):len(MAGIC) + 4], 'little')
+
+
+def _read_header(f: IO[bytes]) -> Dict[str, Any]:
+    length = _header_length(f.read(len(MAGIC) + 4))
+    return json.loads(f.read(length).decode('utf-8'))
+
+
+def loads(buffer: np.ndarray) -> Dict[str, Any]:
+    """
+    Reads columnar result from array of bytes. Arrays are views of
+    `buffer`, so they aren't copied.
+    """
+    length = _header_length(bytes(buffer[:len(MAGIC) + 4]))
+    start = len(MAGIC) + 4
+    out = json.loads(bytes(buffer[start:start + length]).decode('utf-8'))
+    start = _aligned(start + length)
+    for name, array in out.pop('arrays').items():
+        dtype = np.dtype(array['dtype'])
+        shape = tuple(array['shape'])
+        begin = start + array['offset']
+        out[name] = buffer[
+            begin:begin + dtype.itemsize * int(np.prod(shape))
+        ].view(dtype).reshape(shape)
+    return out
+
+
+def load(path: Path) -> Dict[str, Any]:
+    """
+    Reads columnar result file. Arrays are read-only memory maps of file,
+    so they aren't read until they are used.
+    """
+    return loads(np.memmap(path, dtype=np.uint8, mode='r'))
+
+
+def load_result(path: Path) -> Dict[str, Any]:
+    """
+    Reads result of simulation saved in any format.
+    """
+    if path.suffix == COLUMNAR_SUFFIX:
+        return load(path)
+    return pickle.loads(path.read_bytes())
+
+
+def read_info(path: Path) -> Dict[str, Any]:
+    """
+    Returns values of result of simulation, which aren't arrays. Only
+    header is read from columnar file.
+    """
+    if path.suffix == COLUMNAR_SUFFIX:
+        with open(path, 'rb') as f:
+            header = _read_header(f)
+        del header['arrays']
+        return header
+    return {
+        k: v
+        for k, v in pickle.loads(path.read_bytes()).items()
+        if not isinstance(v, np.ndarray)
+    }
+
+
+def result_files(out_dir: Path) -> List[Path]:
+    """
+    Returns files with results of simulations in any format.
+    """
+    return sorted(
+        path
+        for suffix in (PICKLE_SUFFIX, COLUMNAR_SUFFIX)
+        for path in out_dir.glob(f'*{suffix}')
+    )
+
+
+def convert(path: Path) -> Path:
+    """
+    Saves `.pickle` result in columnar format next to it.
+    """
+    out = path.with_suffix(COLUMNAR_SUFFIX)
+    write_atomic(out, dumps(pickle.loads(path.read_bytes())))
+    return out
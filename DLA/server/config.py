@@ -24,6 +24,7 @@ END: Final[float] = server_config['end']
 STEP: Final[float] = server_config['step']
 NUM_OF_SAMPLES: Final[int] = server_config['num_of_samples']
 TIMEOUT: Final[int] = server_config['wait_for']
+ARCHIVE: Final[bool] = server_config.get('archive', False)
 
 # Client breaks, when something else beside output file's name
 # is printed to stdout.
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import os
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Final
+
+import numpy as np
+
+from DLA.results import write_atomic
+
+JOURNAL_FILE: Final[str] = 'journal'
+# Events of works
+DONE: Final[int] = 0
+TIMED_OUT: Final[int] = 1
+# One record per event, or per memory value and event after compaction
+JOURNAL_DTYPE: Final[np.dtype] = np.dtype([
+    ('event', 'u1'),
+    ('memory', '<f8'),
+    ('count', '<i8'),
+])
+# Journal is synchronized with disk after this many events, or when this
+# many seconds passed since last synchronization
+SYNC_EVENTS: Final[int] = 32
+SYNC_SECONDS: Final[float] = 5.0
+# Journal is compacted after this many events
+COMPACT_EVENTS: Final[int] = 4096
+
+
+class StateJournal:
+    """
+    Append-only journal of completed and timed out works of
+    `WorkGenerator`, with number of events of both kinds for every memory
+    value kept in memory.
+
+    Records are appended to open file and synchronized with disk in
+    batches, so at most last `SYNC_EVENTS` events are lost on crash (their
+    works are distributed again). Journal is periodically replaced by one
+    record per memory value and event.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.done: Counter[float] = Counter()
+        self.timed_out: Counter[float] = Counter()
+        if path.exists():
+            self._replay()
+            self.compact()
+        self._file = open(path, 'ab')
+        self._events = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _replay(self) -> None:
+        raw = self.path.read_bytes()
+        # Part of record left by interrupted write is skipped
+        records = np.frombuffer(
+            raw[:len(raw) - len(raw) % JOURNAL_DTYPE.itemsize],
+            dtype=JOURNAL_DTYPE
+        )
+        counters = {DONE: self.done, TIMED_OUT: self.timed_out}
+        for event, memory, count in records.tolist():
+            counters[event][memory] += count
+
+    def append(self, event: int, memory: float) -> None:
+        self._file.write(
+            np.array([(event, memory, 1)], dtype=JOURNAL_DTYPE).tobytes()
+        )
+        (self.done if event == DONE else self.timed_out)[memory] += 1
+        self._events += 1
+        self._unsynced += 1
+        if self._events >= COMPACT_EVENTS:
+            self._file.close()
+            self.compact()
+            self._file = open(self.path, 'ab')
+            self._events = 0
+            self._unsynced = 0
+        elif self._unsynced >= SYNC_EVENTS or \
+                time.monotonic() - self._last_sync >= SYNC_SECONDS:
+            self.sync()
+
+    def sync(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def compact(self) -> None:
+        """
+        Replaces journal with one record per memory value and event.
+        """
+        records = [
+            (event, memory, count)
+            for event, counter in ((DONE, self.done),
+                                   (TIMED_OUT, self.timed_out))
+            for memory, count in counter.items()
+        ]
+        write_atomic(
+            self.path, np.array(records, dtype=JOURNAL_DTYPE).tobytes()
+        )
+
+    def close(self) -> None:
+        self.sync()
+        self._file.close()
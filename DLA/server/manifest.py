@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import json
+import os
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Final, List, Optional
+
+from loguru import logger
+
+from DLA.archive import ARCHIVE_FOLDER, ResultsArchive
+from DLA.results import read_info, result_files, write_atomic
+
+MANIFEST_FILE: Final[str] = 'manifest.jsonl'
+
+
+class Manifest:
+    """
+    Results saved by server, one line of JSON per result: id of work,
+    memory value, file (relative to output folder) and size of result.
+    Number of results of every memory value is kept in memory, so missing
+    works are found without reading results.
+    """
+
+    def __init__(self, out_dir: Path) -> None:
+        self.out_dir = out_dir
+        self.path = out_dir / MANIFEST_FILE
+        self.records: List[Dict[str, Any]] = []
+        self.done: Counter[float] = Counter()
+        # Interrupted write leaves line without new line character
+        self._unfinished_line = False
+        if self.path.exists():
+            self._load()
+
+    def _load(self) -> None:
+        text = self.path.read_text('utf-8')
+        self._unfinished_line = bool(text) and not text.endswith('\n')
+        for line in text.splitlines():
+            try:
+                self._count(json.loads(line))
+            except (json.JSONDecodeError, KeyError):
+                logger.warning(f'Skipping broken line of manifest: {line}')
+
+    def _count(self, record: Dict[str, Any]) -> None:
+        self.done[record['memory']] += 1
+        self.records.append(record)
+
+    def add(
+        self,
+        work_id: Optional[str],
+        memory: float,
+        file: str,
+        size: int
+    ) -> None:
+        record = {
+            'work_id': work_id,
+            'memory': float(memory),
+            'file': file,
+            'size': size,
+        }
+        line = json.dumps(record) + '\n'
+        if self._unfinished_line:
+            line = '\n' + line
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        self._unfinished_line = False
+        self._count(record)
+
+    def rebuild(self) -> None:
+        """
+        Builds manifest again from results in output folder: headers of
+        `.dla` files, `.pickle` files (which don't have headers) and index
+        of archive. Ids of works of these results aren't known.
+        """
+        logger.info('Rebuilding manifest of results.')
+        records: List[Dict[str, Any]] = []
+        for path in result_files(self.out_dir):
+            try:
+                memory = read_info(path)['memory']
+            except Exception as e:
+                logger.warning(f'Skipping unreadable result "{path}": {e}')
+                continue
+            records.append({
+                'work_id': None,
+                'memory': float(memory),
+                'file': path.name,
+                'size': path.stat().st_size,
+            })
+
+        archive = ResultsArchive(self.out_dir / ARCHIVE_FOLDER)
+        for entry in archive.entries():
+            records.append({
+                'work_id': None,
+                'memory': float(entry['memory']),
+                'file': str(
+                    archive.segment_path(entry['memory'])
+                    .relative_to(self.out_dir)
+                ),
+                'size': int(entry['length']),
+            })
+
+        write_atomic(
+            self.path,
+            ''.join(json.dumps(i) + '\n' for i in records).encode('utf-8')
+        )
+        self.records = []
+        self.done = Counter()
+        self._unfinished_line = False
+        for record in records:
+            self._count(record)
+        logger.info(f'Found {len(records)} results.')
@@ -11,7 +11,7 @@ from DLA.server.connection_tracker import ConnectionTracker
 from DLA.server.server_handler import Handler
 from DLA.server.work_generator import WorkGenerator
 
-from .config import END, NUM_OF_SAMPLES, START, STEP
+from .config import ARCHIVE, END, NUM_OF_SAMPLES, START, STEP
 
 logger.add('server_{time}.log', format='{time} | {level} | {message}')
 
@@ -19,16 +19,16 @@ SERVER_PORT: Final[int] = int(os.environ.get('DLA_PORT', 1025))
 
 
 @logger.catch
-async def server(out_dir: Path) -> None:
+async def server(out_dir: Path, rebuild_manifest: bool = False) -> None:
     '''src: https://docs.python.org/3/library/asyncio-stream.html'''
 
     work_gen = WorkGenerator(START, END, STEP, NUM_OF_SAMPLES)
     close_server = asyncio.Event()
     conn = ConnectionTracker(close_server)
 
-    work_gen.configure(out_dir)
+    work_gen.configure(out_dir, rebuild_manifest)
 
-    handler = Handler(out_dir, conn, work_gen)
+    handler = Handler(out_dir, conn, work_gen, ARCHIVE)
 
     serv = await asyncio.start_server(
         handler.handle_request,
@@ -50,6 +50,7 @@ async def server(out_dir: Path) -> None:
     serv.close()
     await serv.wait_closed()
     logger.info('Server closed.')
+    work_gen.close()
     work_gen.clean_states(work_gen.state_folder)
 
 
@@ -3,11 +3,12 @@ from __future__ import annotations
 import asyncio
 from pathlib import Path
 from socket import socket
-from typing import cast
+from typing import Optional, cast
 
 import yaml
 from loguru import logger
 
+from DLA.archive import ARCHIVE_FOLDER, ResultsArchive
 from DLA.server.config import CONFIG_TEMPLATE, TIMEOUT
 from DLA.server.connection import Connection
 from DLA.server.connection_tracker import ConnectionTracker
@@ -20,12 +21,20 @@ class Disconnected(Exception):
 
 class Handler:
     def __init__(
-        self, out_dir: Path, conn: ConnectionTracker, work_gen: WorkGenerator
+        self,
+        out_dir: Path,
+        conn: ConnectionTracker,
+        work_gen: WorkGenerator,
+        archive: bool = False
     ) -> None:
         self.out_dir = out_dir
         self.conn = conn
         self.work_gen = work_gen
         self.out_dir.mkdir(parents=True, exist_ok=True)
+        # With archive, results are appended to it instead of separate files
+        self.archive: Optional[ResultsArchive] = (
+            ResultsArchive(out_dir / ARCHIVE_FOLDER) if archive else None
+        )
 
     async def gen_beta(self, conn_data: Connection):
         beta = await self.work_gen.get()
@@ -41,28 +50,49 @@ class Handler:
         )
 
     async def save_results(self, conn_data: Connection) -> bool:
+        out_file: Optional[Path] = None
+        archived = False
         try:
             name_len = int.from_bytes(await conn_data.read(1), 'big')
             filename = (await conn_data.read(name_len)).decode('utf-8')
             data = await conn_data.read(-1)
 
-            out_file = self.out_dir / filename
-            out_file.write_bytes(data)
-            conn_data.info(f'Work completed, saved to "{out_file}"')
+            beta = cast(float, conn_data.beta)
 
-            await self.work_gen.work_completed(cast(float, conn_data.beta))
+            if self.archive is not None:
+                self.archive.append(beta, filename, data)
+                archived = True
+                conn_data.info(
+                    f'Work completed, appended to "{self.archive.directory}"'
+                )
+                filename = str(
+                    self.archive.segment_path(beta).relative_to(self.out_dir)
+                )
+            else:
+                out_file = self.out_dir / filename
+                out_file.write_bytes(data)
+                conn_data.info(f'Work completed, saved to "{out_file}"')
 
-            return True
+            self.work_gen.manifest.add(
+                conn_data.work_id, beta, filename, len(data)
+            )
         except PermissionError:
             conn_data.warning('Disconnected.')
         except Exception as e:
             conn_data.error(f'Exception: {e}')
+        else:
+            await self.work_gen.work_completed(beta)
+            return True
 
+        # Result, which isn't in manifest, is removed, because its work is
+        # distributed again
         try:
-            if out_file.exists():
+            if archived:
+                cast(ResultsArchive, self.archive).remove_last()
+            elif out_file is not None and out_file.exists():
                 out_file.unlink()
-        except Exception:
-            pass
+        except Exception as e:
+            conn_data.error(f'Result of failed work wasn\'t removed: {e}')
 
         return False
 
@@ -129,15 +159,12 @@ class Handler:
         conn_data = Connection(reader, writer)
         await self._handle_request(conn_data)
         if not (
-            await self.work_gen.are_values_left(False) or self.conn.is_closed()
+            await self.work_gen.are_values_left() or self.conn.is_closed()
         ):
-            self.work_gen.get_missing_works(self.out_dir)
-            if self.work_gen.to_distribute:
-                logger.warning(
-                    'All assigned jobs done, but missing memory values were '
-                    'found. Filling in missing memory values.'
-                )
-            else:
+            # Missing works are usually found when last work is completed,
+            # but not when there was no work left at start
+            await self.work_gen.get_missing_works()
+            if not self.work_gen.to_distribute:
                 logger.info(
                     'There are no more work to assign. '
                     'Starting to close the server'
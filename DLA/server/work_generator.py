@@ -1,24 +1,34 @@
 from __future__ import annotations
 
 import asyncio
-import pickle
 import shutil
-from collections import Counter
+from collections import deque
 from pathlib import Path
-from typing import Dict, Optional, Tuple
+from typing import Deque, Dict, Optional
 
 import numpy as np
 import yaml
 from loguru import logger
 
 from DLA.server import config_dict
+from DLA.server.journal import (
+    DONE,
+    JOURNAL_FILE,
+    TIMED_OUT,
+    StateJournal,
+)
+from DLA.server.manifest import Manifest
 
 
 class WorkGenerator:
     lock: asyncio.Lock
+    condition: asyncio.Condition
+    manifest: Manifest
+    journal: StateJournal
 
     def __init__(self, start: float, end: float, step: float, num: int):
         self.__class__.lock = asyncio.Lock()
+        self.__class__.condition = asyncio.Condition(self.lock)
         _points = end - start
         points = int(_points)
         while _points != points:
@@ -32,80 +42,65 @@ class WorkGenerator:
         self.waiting_for_results: Dict[float, int] = {
             i: 0 for i in tmp
         }
-        self.num_of_done_works = 0
+        self.num_of_waiting_works = 0
         self.state_loaded_from_file = False
+        self._fill_queue()
+
+    def _fill_queue(self) -> None:
+        """
+        Puts works left to distribute in queue, in random order.
+        """
+        values = np.fromiter(self.to_distribute, dtype=np.double)
+        counts = np.fromiter(self.to_distribute.values(), dtype=np.int64)
+        self.queue: Deque[float] = deque(
+            np.random.permutation(np.repeat(values, counts)).tolist()
+        )
 
-    def _gather_beta_values(self) -> Tuple[float, ...]:
-        return tuple(k for k, v in self.to_distribute.items() if v)
-
-    async def are_values_left(self, is_locked: bool = True) -> bool:
-        if not is_locked:
-            await self.lock.acquire()
-
-        val = bool(
-            self._gather_beta_values() or
-            tuple(
-                k
-                for k, v in self.waiting_for_results.items()
-                if v
-            ))
-
-        if not is_locked:
-            self.lock.release()
-
-        return val
-
-    async def _is_done(self) -> bool:
-        await self.lock.acquire()
-        if self._gather_beta_values():
-            return False
-
-        if bool(self.waiting_for_results.values()):
-            while await self.are_values_left(True):
-                if bool(self._gather_beta_values()):
-                    return False
-
-                self.lock.release()
-                await asyncio.sleep(5)
-                await self.lock.acquire()
-
-        self.lock.release()
-        return True
+    async def are_values_left(self) -> bool:
+        async with self.lock:
+            return bool(self.queue or self.num_of_waiting_works)
 
     async def get(self) -> Optional[float]:
-        if await self._is_done():
-            return None
-
-        t = self._gather_beta_values()
+        """
+        Returns memory value of next work. When all works are distributed,
+        waits until work times out or missing works are found. Returns
+        `None`, when there is no work left.
+        """
+        async with self.condition:
+            while not self.queue:
+                if not self.num_of_waiting_works:
+                    return None
+                await self.condition.wait()
+
+            val = self.queue.popleft()
+            self.to_distribute[val] -= 1
+            self.waiting_for_results[val] += 1
+            self.num_of_waiting_works += 1
 
-        val = np.random.choice(t)
-        self.to_distribute[val] -= 1
-        self.waiting_for_results[val] += 1
-
-        self.lock.release()
-
-        return float(val)
+        return val
 
     async def work_completed(self, val: float) -> None:
-        async with self.lock:
+        async with self.condition:
             self.waiting_for_results[val] -= 1
-            self.save_state()
+            self.num_of_waiting_works -= 1
+            self.journal.append(DONE, val)
+            if not (self.queue or self.num_of_waiting_works):
+                # Result is already in manifest, so missing works are known
+                self._queue_missing_works()
 
     async def work_timed_out(self, val: float) -> None:
-        async with self.lock:
+        async with self.condition:
             self.to_distribute[val] += 1
             self.waiting_for_results[val] -= 1
-
-    def save_state(self) -> None:
-        data = pickle.dumps(self.to_distribute)
-        (
-            self.state_folder / f'{self.num_of_done_works}.state'
-        ).write_bytes(data)
-        self.num_of_done_works += 1
+            self.num_of_waiting_works -= 1
+            self.journal.append(TIMED_OUT, val)
+            # Work is distributed again before others
+            self.queue.appendleft(val)
+            self.condition.notify()
 
     def try_load_saved_state(self, out_dir: Path) -> None:
         saved_state_folder = out_dir / 'state'
-        if not saved_state_folder.exists():
+        if not (saved_state_folder / JOURNAL_FILE).exists():
             logger.info('No states were found.')
             return
 
@@ -124,28 +119,20 @@ class WorkGenerator:
             )
             return
 
-        sorted_saved_state_files = sorted(
-            saved_state_folder.glob('*.state'),
-            key=lambda x: int(x.stem)
-        )
-
-        if not len(sorted_saved_state_files):
-            logger.info('No states were found.')
-            return
-
-        last_state = sorted_saved_state_files[-1]
-        state_data: Dict[float, int] = pickle.loads(
-            last_state.read_bytes()
-        )
-
-        self.to_distribute = state_data
+        # Works distributed, but not completed before restart, are
+        # distributed again
+        self.journal = StateJournal(saved_state_folder / JOURNAL_FILE)
+        done = self.journal.done
+        self.to_distribute = {
+            k: max(v - done[k], 0) for k, v in self.to_distribute.items()
+        }
         self.state_loaded_from_file = True
-        self.num_of_done_works = int(last_state.stem) + 1
 
         logger.info(
             'Successfully loaded last state. '
             f'State: {self.to_distribute}, '
-            f'id of state: {self.num_of_done_works - 1}'
+            f'completed works: {sum(done.values())}, '
+            f'timed out works: {sum(self.journal.timed_out.values())}'
         )
 
     def set_up_state_saving(self, out_dir: Path) -> None:
@@ -160,6 +147,10 @@ class WorkGenerator:
 
         (self.state_folder / 'config.yml').write_text(yaml.dump(config_dict))
         logger.info('Saved current configuration.')
+        self.journal = StateJournal(self.state_folder / JOURNAL_FILE)
+
+    def close(self) -> None:
+        self.journal.close()
 
     @staticmethod
     def clean_states(state_folder: Path) -> None:
@@ -167,19 +158,34 @@ class WorkGenerator:
             shutil.rmtree(state_folder)
             logger.info('Removed states folder.')
 
-    def configure(self, out_dir: Path) -> None:
+    def configure(self, out_dir: Path, rebuild_manifest: bool = False) -> None:
         self.try_load_saved_state(out_dir)
+        self._fill_queue()
         self.set_up_state_saving(out_dir)
-
-    def get_missing_works(self, out_dir: Path) -> None:
-        logger.info('Checking for missing work files.')
-        data_files = out_dir.glob('*.pickle')
-        loaded_memory_values = [
-            pickle.loads(i.read_bytes())['memory'] for i in data_files
-        ]
-        missing_memory_values = {
-            k: self.num_of_samples_per_memory - v
-            for k, v in Counter(loaded_memory_values).items()
-            if v < self.num_of_samples_per_memory
+        self.manifest = Manifest(out_dir)
+        if rebuild_manifest or not self.manifest.path.exists():
+            self.manifest.rebuild()
+
+    def _queue_missing_works(self) -> None:
+        """
+        Puts works without results in manifest in queue and wakes waiting
+        clients, which get missing work or no work. Called with lock held.
+        """
+        logger.info('Checking for missing works.')
+        done = self.manifest.done
+        self.to_distribute = {
+            k: self.num_of_samples_per_memory - done[k]
+            for k in self.waiting_for_results
+            if done[k] < self.num_of_samples_per_memory
         }
-        self.to_distribute = missing_memory_values
+        self._fill_queue()
+        if self.queue:
+            logger.warning(
+                'All assigned jobs done, but missing memory values were '
+                'found. Filling in missing memory values.'
+            )
+        self.condition.notify_all()
+
+    async def get_missing_works(self) -> None:
+        async with self.condition:
+            self._queue_missing_works()
@@ -1,22 +1,27 @@
 from __future__ import annotations
 
+import os
 import pickle
 import signal
 import sys
 from datetime import datetime
-from gc import collect
 from pathlib import Path
-from typing import TYPE_CHECKING, Dict, NoReturn, Tuple, Union
+from typing import (TYPE_CHECKING, Any, Dict, NoReturn, Optional, Tuple,
+                    Union)
+from uuid import uuid4
 
 import numpy as np
 from beautifultable import BeautifulTable
 
 from DLA import BLACK, Vec, plane
-from DLA.config import (ALPHA, BETA, FPS, MAX_STEPS, NUM_OF_PARTICLES,
-                        PRINT_RESULTS, RADIUS, USE_PYGAME, WINDOW_SIZE,
+from DLA.config import (CONFIG, FPS, PRINT_RESULTS, USE_PYGAME, Config,
                         WINDOW_SIZE_FOR_RENDERING)
 from DLA.exceptions import StopSimulation
+from DLA.particles import StuckParticles, WalkingParticles
 from DLA.plane.dimension import Dimension
+from DLA.recorder import MetricsRecorder
+from DLA.results import (COLUMNAR_SUFFIX, PICKLE_SUFFIX, dumps,
+                         write_atomic)
 
 if USE_PYGAME or TYPE_CHECKING:
     import pygame
@@ -26,52 +31,172 @@ if USE_PYGAME or TYPE_CHECKING:
     import pygame.surface as surface
     import pygame.time as time
 
-p = plane.Plane.new()
-num_of_iterations = 0
 
-
-def print_dim():
-    dim = Dimension(p)
-    dim.count()
-
-    tab = BeautifulTable(precision=6)
-    tab.columns.header = ['Box size', 'Num of squares']
-
-    for k, v in dim.items():
-        tab.rows.append([k, v])
-
-    print(tab)
-
-
-def get_data() -> Dict[str, Union[Vec, float]]:
-    out: Dict[str, Union[float, np.ndarray]] = {
-        'radius': RADIUS,
-        'window_size': WINDOW_SIZE,
-        'num_of_particles': NUM_OF_PARTICLES,
-        'memory': BETA,
-        'step_strength': ALPHA,
-        'num_of_iterations': num_of_iterations,
-    }
-
-    out.update(p.get_data())
-    dim = Dimension(p)
-    dim.count()
-    out.update(dim.get_data())
-    return out
-
-
-def save_data():
-    data = get_data()
-    raw_data = pickle.dumps(data)
-    filename = f'{datetime.now().strftime("%d.%m.%Y-%H.%M.%S.%f")}.pickle'
-    Path(filename).write_bytes(raw_data)
-    print(filename)
+def timestamp() -> str:
+    return datetime.now().strftime("%d.%m.%Y-%H.%M.%S.%f")
+
+
+class Simulation:
+    """
+    Single run of DLA, which owns its configuration, plane and particles,
+    so many simulations can be run one after another in one process.
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        out_dir: Path = Path('.'),
+        metrics: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        `metrics` are path and records of metrics of resumed simulation.
+        """
+        self.config = config
+        self.out_dir = out_dir
+        self.plane = (
+            plane.FlatPlane if config.flat_tree else plane.Plane
+        ).new(config)
+        self.num_of_iterations = 0
+        self.recorder: Optional[MetricsRecorder] = None
+        if config.record_steps:
+            if metrics is None:
+                # Renamed after result, when it's saved
+                metrics = {
+                    'path': out_dir / f'{timestamp()}-{os.getpid()}.metrics',
+                    'records': None,
+                }
+            self.recorder = MetricsRecorder(
+                metrics['path'], self.plane.count_boxes()[0],
+                metrics['records']
+            )
+
+    @property
+    def walking_particles(self) -> WalkingParticles:
+        return self.plane._walking_points
+
+    @property
+    def stuck_particles(self) -> StuckParticles:
+        return self.plane._stuck_points
+
+    def update(self) -> None:
+        self.num_of_iterations += 1
+        self.plane.update()
+        self.record()
+
+    def record(self) -> None:
+        """
+        Records metrics of cluster every `record_steps` updates.
+        """
+        if self.recorder is not None and \
+                self.num_of_iterations % self.config.record_steps == 0:
+            self.recorder.record(self)
+
+    def run(self, checkpoint: Optional[Path] = None) -> None:
+        """
+        Updates simulation until all particles are stuck or `max_steps`
+        updates were made. With `checkpoint`, state is saved to it every
+        `checkpoint_steps` updates and it's removed, when simulation ends.
+        """
+        every = self.config.checkpoint_steps
+        try:
+            for _ in range(self.config.max_steps - self.num_of_iterations):
+                self.update()
+                if checkpoint and every and \
+                        self.num_of_iterations % every == 0:
+                    self.save_checkpoint(checkpoint)
+        except StopSimulation:
+            pass
+        if checkpoint:
+            checkpoint.unlink(missing_ok=True)
+
+    def save_checkpoint(self, path: Path) -> None:
+        """
+        Saves everything needed for continuing simulation: configuration,
+        walking particles (with state of their random number generator),
+        stuck particles in order of sticking, number of updates and metrics
+        recorded so far.
+        """
+        state: Dict[str, Any] = {
+            'config': self.config,
+            'num_of_iterations': self.num_of_iterations,
+            'walking_particles': self.walking_particles,
+            'stuck_particles': self.stuck_particles.view,
+        }
+        if self.recorder is not None:
+            state['metrics'] = {
+                'path': self.recorder.path,
+                'records': self.recorder.records(),
+            }
+        write_atomic(path, pickle.dumps(state))
+
+    @classmethod
+    def from_checkpoint(cls, path: Path) -> Simulation:
+        """
+        Loads simulation saved by `save_checkpoint`. Planes are built again
+        by adding stuck particles in the same order, so simulation continues
+        exactly as if it wasn't interrupted.
+        """
+        state = pickle.loads(path.read_bytes())
+        obj = cls(state['config'], metrics=state.get('metrics'))
+        obj.num_of_iterations = state['num_of_iterations']
+        obj.plane._walking_points = state['walking_particles']
+        for point in state['stuck_particles'][1:]:
+            obj.stuck_particles.add_stuck(point)
+        return obj
+
+    def dimension(self) -> Dimension:
+        dim = Dimension(self.plane)
+        dim.count()
+        return dim
+
+    def print_dim(self) -> None:
+        tab = BeautifulTable(precision=6)
+        tab.columns.header = ['Box size', 'Num of squares']
+
+        for k, v in self.dimension().items():
+            tab.rows.append([k, v])
+
+        print(tab)
+
+    def get_data(self) -> Dict[str, Union[Vec, float]]:
+        out: Dict[str, Union[float, np.ndarray]] = {
+            'radius': self.config.radius,
+            'window_size': self.config.window_size,
+            'num_of_particles': self.config.num_of_particles,
+            'memory': self.config.beta,
+            'step_strength': self.config.alpha,
+            'num_of_iterations': self.num_of_iterations,
+        }
+
+        out.update(self.plane.get_data())
+        out.update(self.dimension().get_data())
+        return out
+
+    def save_data(self, out_dir: Optional[Path] = None) -> Path:
+        if self.config.columnar_results:
+            raw_data = dumps(self.get_data())
+            suffix = COLUMNAR_SUFFIX
+        else:
+            raw_data = pickle.dumps(self.get_data())
+            suffix = PICKLE_SUFFIX
+        # Simulations finishing at the same time don't overwrite results
+        path = (
+            (out_dir or self.out_dir) /
+            f'{timestamp()}-{uuid4().hex[:8]}{suffix}'
+        )
+        write_atomic(path, raw_data)
+        if self.recorder is not None:
+            # Final state is recorded, even between records
+            if self.recorder.last_iteration != self.num_of_iterations:
+                self.recorder.record(self)
+            self.recorder.close(path.with_suffix('.metrics'))
+        return path
 
 
-def at_end(*_):
+def at_end(simulation: Simulation) -> NoReturn:
     if PRINT_RESULTS:
-        print_dim()
-    save_data()
+        simulation.print_dim()
+    print(simulation.save_data())
     sys.exit(0)
 
 
@@ -90,80 +215,91 @@ def init_pygame(
     return screen, clock
 
 
-def render(surface_: surface.Surface) -> None:
-    p.draw(surface_)
+def render(simulation: Simulation, surface_: surface.Surface) -> None:
+    simulation.plane.draw(surface_)
 
 
 def pygame_loop(
-    surface_: surface.Surface, clock: time.Clock, update: bool = True
+    simulation: Simulation,
+    surface_: surface.Surface,
+    clock: time.Clock,
+    update: bool = True
 ) -> None:
-    global num_of_iterations
-
     clock.tick(FPS)
     if update:
-        num_of_iterations += 1
         display.set_caption(
-            f"Diffusion Limited Aggregation - {BETA} - {num_of_iterations}"
+            "Diffusion Limited Aggregation - "
+            f"{simulation.config.beta} - {simulation.num_of_iterations + 1}"
         )
     for event in events.get():
         if event.type == pygame.QUIT:
-            at_end()
+            at_end(simulation)
 
     keys = pygame.key.get_pressed()
     if keys[pygame.K_ESCAPE]:
-        at_end()
+        at_end(simulation)
 
     if update:
-        p.update()
+        simulation.update()
 
     surface_.fill(BLACK)
 
-    render(surface_)
+    render(simulation, surface_)
 
     display.flip()
 
 
-def main_pygame() -> NoReturn:
+def main_pygame(simulation: Simulation) -> NoReturn:
     surface_, clock = init_pygame()
 
     surface_.fill(BLACK)
 
-    render(surface_)
+    render(simulation, surface_)
 
     display.flip()
 
     try:
-        for _ in range(MAX_STEPS // 100):
-            for _ in range(100):
-                pygame_loop(surface_, clock)
-            collect()
+        # Resumed simulation made some of its updates already
+        for _ in range(
+            simulation.config.max_steps - simulation.num_of_iterations
+        ):
+            pygame_loop(simulation, surface_, clock)
         raise StopSimulation
     except StopSimulation:
         while True:
-            pygame_loop(surface_, clock, False)
+            pygame_loop(simulation, surface_, clock, False)
 # endregion
 
 
-def main_no_pygame() -> NoReturn:
-    global num_of_iterations
+def main_no_pygame(
+    simulation: Simulation,
+    checkpoint: Optional[Path] = None
+) -> NoReturn:
     try:
-        for _ in range(MAX_STEPS // 100):
-            for _ in range(100):
-                num_of_iterations += 1
-                p.update()
-            collect()
-    except StopSimulation:
-        pass
+        simulation.run(checkpoint)
     finally:
-        at_end()
+        at_end(simulation)
 
 
-def main() -> NoReturn:
-    signal.signal(signal.SIGINT, at_end)
+def main(
+    config: Config = CONFIG,
+    checkpoint: Optional[Path] = None,
+    resume: Optional[Path] = None
+) -> NoReturn:
+    if resume is None:
+        simulation = Simulation(config)
+    else:
+        simulation = Simulation.from_checkpoint(resume)
+    signal.signal(signal.SIGINT, lambda *_: at_end(simulation))
     if USE_PYGAME:
-        main_pygame()
+        main_pygame(simulation)
     else:
-        main_no_pygame()
+        if checkpoint is None:
+            # Simulations started in the same folder don't share checkpoints
+            checkpoint = resume or Path(f'{timestamp()}-{os.getpid()}.ckpt')
+        if simulation.config.checkpoint_steps:
+            print(f'Saving checkpoints to "{checkpoint}"', file=sys.stderr)
+        main_no_pygame(simulation, checkpoint)
 
 
 if __name__ == '__main__':
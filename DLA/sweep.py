@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from copy import deepcopy
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+from loguru import logger
+
+from DLA.results import read_info, result_files
+
+_config_template: Dict[str, Any]
+
+
+def memory_values(start: float, end: float, step: float) -> List[float]:
+    """
+    Returns memory values distributed by `WorkGenerator` for the same
+    `start`, `end` and `step`.
+    """
+    return [float(i) for i in np.arange(start, end, step)]
+
+
+def count_results(out_dir: Path) -> Counter[float]:
+    """
+    Returns number of saved results for every memory value.
+    """
+    done: Counter[float] = Counter()
+    for path in result_files(out_dir):
+        try:
+            done[read_info(path)['memory']] += 1
+        except Exception as e:
+            logger.warning(f'Skipping unreadable result "{path}": {e}')
+    return done
+
+
+def _init_worker(config_template: Dict[str, Any]) -> None:
+    global _config_template
+    _config_template = config_template
+
+    # Display settings are read by `DLA.config` at import, which also
+    # builds `CONFIG`, so it needs some memory value
+    import DLA
+    module_config = deepcopy(config_template)
+    module_config['simulation'].setdefault('memory', 0.0)
+    setattr(DLA, 'config_dict', module_config)
+
+
+def _run_simulations(
+    memory: float,
+    replicas: int,
+    out_dir: Path
+) -> List[Path]:
+    from DLA.config import Config
+    from DLA.ensemble import Ensemble
+    from DLA.simulation import Simulation
+
+    config = deepcopy(_config_template)
+    config['simulation']['memory'] = memory
+    if replicas == 1:
+        simulation = Simulation(Config(config), out_dir)
+        simulation.run()
+        return [simulation.save_data()]
+
+    ensemble = Ensemble(Config(config), replicas, out_dir)
+    ensemble.run()
+    return ensemble.save_data()
+
+
+def sweep(
+    config_dict: Dict[str, Any],
+    out_dir: Path,
+    jobs: int,
+    replicas: int = 1
+) -> None:
+    """
+    Runs `num_of_samples` simulations for every memory value from server
+    configuration on `jobs` processes, skipping results already saved in
+    `out_dir`. Up to `replicas` samples of the same memory value are run
+    together as one `Ensemble`.
+    """
+    server_config = config_dict['server']
+    config_template = config_dict['simulation']
+    config_template['display']['use_pygame'] = False
+    config_template['display']['print_results'] = False
+    if config_template['system'].get('seed') is not None:
+        logger.warning('Seed is set, all samples of memory value are equal.')
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    done = count_results(out_dir)
+    work: List[Tuple[float, int]] = []
+    for memory in memory_values(
+        server_config['start'], server_config['end'], server_config['step']
+    ):
+        left = server_config['num_of_samples'] - done[memory]
+        work.extend(
+            (memory, min(replicas, left - i))
+            for i in range(0, left, replicas)
+        )
+    total = sum(num for _, num in work)
+    logger.info(
+        f'{sum(done.values())} results found, {total} simulations left.'
+    )
+
+    with ProcessPoolExecutor(
+        jobs, initializer=_init_worker, initargs=(config_template,)
+    ) as executor:
+        futures = {
+            executor.submit(_run_simulations, memory, num, out_dir): memory
+            for memory, num in work
+        }
+        finished = 0
+        for future in as_completed(futures):
+            paths = future.result()
+            finished += len(paths)
+            for path in paths:
+                logger.info(
+                    f'[{finished}/{total}] memory = {futures[future]}, '
+                    f'saved to "{path}"'
+                )
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import array
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 import numpy as np
 
@@ -40,3 +40,137 @@ def check_particle_outside_plane(
     radius: float,
     plane_size: float
 ) -> array.array[int]: ...
+
+
+def update_steps(
+    last_step: np.ndarray,
+    step_len: np.ndarray,
+    noise: np.ndarray,
+    alpha: float,
+    beta: float
+) -> None: ...
+
+
+def move_walkers(
+    pos: np.ndarray,
+    last_step: np.ndarray,
+    step_len: np.ndarray,
+    clearances: np.ndarray,
+    low: float,
+    high: float
+) -> None: ...
+
+
+class CollisionCells:
+    plane_size: float
+    cell_size: float
+    radius: float
+    cells_per_row: int
+
+    def __init__(
+        self,
+        plane_size: float,
+        cell_size: float,
+        radius: float
+    ) -> None: ...
+
+    def update(self, cell: int, coords: array.array[float]) -> None: ...
+
+    def collision_times(
+        self,
+        moving_parts: np.ndarray,
+        move_vecs: np.ndarray,
+        num_threads: int = ...,
+        clearances: Optional[np.ndarray] = ...
+    ) -> np.ndarray: ...
+
+
+def collision_cells_collision_times(
+    cells: List[CollisionCells],
+    owners: np.ndarray,
+    moving_parts: np.ndarray,
+    move_vecs: np.ndarray,
+    num_threads: int = ...,
+    clearances: Optional[np.ndarray] = ...
+) -> np.ndarray: ...
+
+
+class NodePool:
+    children: np.ndarray
+    start: np.ndarray
+    size: np.ndarray
+    full: np.ndarray
+    can_be_full: np.ndarray
+    count: int
+    plane_size: float
+    particle_plane_size: float
+    second_min_box_size: float
+    min_box_size: float
+    radius: float
+    cells_per_row: int
+    coords: List[Optional[array.array[float]]]
+    keep_coords: bool
+    cells: CollisionCells
+    counts: np.ndarray
+
+    def __init__(
+        self,
+        plane_size: float,
+        particle_plane_size: float,
+        second_min_box_size: float,
+        min_box_size: float,
+        radius: float,
+        keep_coords: bool = ...,
+        capacity: int = ...
+    ) -> None: ...
+
+    def add_point(self, particle: np.ndarray) -> None: ...
+
+    def count_boxes(self) -> np.ndarray: ...
+
+    def collision_times(
+        self,
+        moving_parts: np.ndarray,
+        move_vecs: np.ndarray,
+        num_threads: int = ...,
+        clearances: Optional[np.ndarray] = ...
+    ) -> np.ndarray: ...
+
+
+class CellList:
+    head: np.ndarray
+    next_part: np.ndarray
+    plane_size: float
+    cell_size: float
+    radius: float
+    cells_per_row: int
+
+    def __init__(
+        self,
+        plane_size: float,
+        cell_size: float,
+        radius: float,
+        capacity: int = ...
+    ) -> None: ...
+
+    def add_point(self, particle: np.ndarray, point: int) -> None: ...
+
+    def collision_times(
+        self,
+        stuck_points: np.ndarray,
+        moving_parts: np.ndarray,
+        move_vecs: np.ndarray,
+        num_threads: int = ...,
+        clearances: Optional[np.ndarray] = ...
+    ) -> np.ndarray: ...
+
+
+def cell_lists_collision_times(
+    cell_lists: List[CellList],
+    stuck_points: List[np.ndarray],
+    owners: np.ndarray,
+    moving_parts: np.ndarray,
+    move_vecs: np.ndarray,
+    num_threads: int = ...,
+    clearances: Optional[np.ndarray] = ...
+) -> np.ndarray: ...
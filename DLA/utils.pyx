@@ -8,14 +8,19 @@ import numpy as np
 cimport cython
 cimport numpy as np
 from cpython cimport array
+from cpython.mem cimport PyMem_Free, PyMem_Malloc
 from cpython.ref cimport PyObject
+from cython.parallel cimport prange
 from cython.view cimport array as cvarray
 
 import array
 
 
 cdef extern from "math.h":
-    double sqrt(double m)
+    double sqrt(double m) nogil
+    double floor(double m) nogil
+    double ceil(double m) nogil
+    double log2(double m) nogil
 
 
 cdef inline double dot(double[::1] a, double[::1] b):
@@ -145,11 +150,19 @@ cpdef array.array check_particle_outside_plane(double[::1] particle, double radi
     return out
 
 @cython.cdivision(True)
-cdef double calc_collision_time(double[::1] static_part, double[::1] moving_part, double[::1] move_vec, double radius):
-    cdef double a = _dot_self(move_vec)
-    cdef double tmp_1 = moving_part[0] - static_part[0]
-    cdef double tmp_2 = moving_part[1] - static_part[1]
-    cdef double b = move_vec[0] * tmp_1 + move_vec[1] * tmp_2
+cdef inline double _calc_collision_time(
+    double static_x,
+    double static_y,
+    double moving_x,
+    double moving_y,
+    double move_x,
+    double move_y,
+    double radius
+) nogil:
+    cdef double a = move_x * move_x + move_y * move_y
+    cdef double tmp_1 = moving_x - static_x
+    cdef double tmp_2 = moving_y - static_y
+    cdef double b = move_x * tmp_1 + move_y * tmp_2
 
     cdef double c = tmp_1 * tmp_1 + tmp_2 * tmp_2 - 4 * radius * radius
 
@@ -167,10 +180,11 @@ cdef double calc_collision_time(double[::1] static_part, double[::1] moving_part
     return min(o1, o2)
 
 
-cdef double check_collision_times(double[:, ::1] static_parts, double[::1] moving_part, double[::1] move_vec, double radius):
+cdef double check_collision_times(double[::1] static_parts, double[::1] moving_part, double[::1] move_vec, double radius):
+    # `static_parts` stores coordinates of particles one after another
     cdef double out_time = 2
     cdef Py_ssize_t i
-    cdef Py_ssize_t size = static_parts.shape[0]
+    cdef Py_ssize_t size = static_parts.shape[0] // 2
     cdef double distance_between_particles
     cdef double time_to_collision
 
@@ -178,9 +192,14 @@ cdef double check_collision_times(double[:, ::1] static_parts, double[::1] movin
     cdef double r2 = 4 * radius * radius
 
     for i in range(size):
-        distance_between_particles = ((moving_part[0] - static_parts[i][0]) ** 2 + (moving_part[1] - static_parts[i][1]) ** 2)
+        distance_between_particles = ((moving_part[0] - static_parts[2 * i]) ** 2 + (moving_part[1] - static_parts[2 * i + 1]) ** 2)
         if distance_between_particles <= move_range:
-            time_to_collision = calc_collision_time(static_parts[i], moving_part, move_vec, radius)
+            time_to_collision = _calc_collision_time(
+                static_parts[2 * i], static_parts[2 * i + 1],
+                moving_part[0], moving_part[1],
+                move_vec[0], move_vec[1],
+                radius
+            )
             if time_to_collision < 0 and distance_between_particles >= r2:
                 continue
             out_time = min(time_to_collision, out_time)
@@ -192,7 +211,6 @@ cdef double _get_collision_time(
     double particle_plane_size,
     double[::1] start_pos,
     double plane_size,
-    double[:, ::1] stuck_points,
     double[::1] moving_part,
     double[::1] move_vec,
     double radius,
@@ -201,10 +219,8 @@ cdef double _get_collision_time(
 ):
     cdef double time = 2.0
     cdef list sub_planes = getattr(plane, '_sub_planes')
-    cdef Py_ssize_t i, j, k
+    cdef Py_ssize_t i
     cdef double[::1] sub_plane_coords
-    cdef unsigned int[::1] particles_in_sub_plane
-    cdef double[:, ::1] can_collide_with
     cdef object sub_plane
     plane_size /= 2
     
@@ -218,15 +234,8 @@ cdef double _get_collision_time(
         if circle_square_collision(sub_plane_coords, area_check_center, plane_size, area_check_radius):
 
             if plane_size == particle_plane_size:
-                particles_in_sub_plane = getattr(sub_plane, 'parts')
-                k = particles_in_sub_plane.shape[0]
-                can_collide_with = cvarray(shape=(k, 2), itemsize=sizeof(double), format='d')
-
-                for j in range(k):
-                    can_collide_with[j] = stuck_points[particles_in_sub_plane[j]]
-
                 time = min(time, check_collision_times(
-                    can_collide_with,
+                    getattr(sub_plane, 'coords'),
                     moving_part,
                     move_vec,
                     radius
@@ -237,7 +246,6 @@ cdef double _get_collision_time(
                     particle_plane_size,
                     sub_plane_coords,
                     plane_size,
-                    stuck_points,
                     moving_part,
                     move_vec,
                     radius,
@@ -254,8 +262,1007 @@ cpdef double get_collision_time(object plane, double particle_plane_size, double
     cdef double area_check_radius = sqrt(_dot_self(move_vec)) / 2 + 1.5 * radius
     cdef double[::1] start_pos = getattr(plane, 'start_pos')
     cdef double plane_size = getattr(plane, 'size')
-    cdef double[:, ::1] stuck_points = getattr(getattr(plane, '_stuck_points'), 'view')
     area_check_center[0] += move_vec[0] / 2
     area_check_center[1] += move_vec[1] / 2
 
-    return _get_collision_time(plane, particle_plane_size, start_pos, plane_size, stuck_points, moving_part, move_vec, radius, area_check_center, area_check_radius)
+    return _get_collision_time(plane, particle_plane_size, start_pos, plane_size, moving_part, move_vec, radius, area_check_center, area_check_radius)
+
+
+cdef inline bint _circle_square_collision(
+    double square_x,
+    double square_y,
+    double particle_x,
+    double particle_y,
+    double square_size,
+    double radius
+) nogil:
+    cdef double tX = particle_x, tY = particle_y
+    cdef double dX, dY
+
+    if particle_x < square_x:
+        tX = square_x
+    elif particle_x > square_x + square_size:
+        tX = square_x + square_size
+
+    if particle_y < square_y:
+        tY = square_y
+    elif particle_y > square_y + square_size:
+        tY = square_y + square_size
+
+    dX = particle_x - tX
+    dY = particle_y - tY
+
+    return (dX * dX) + (dY * dY) < radius * radius
+
+
+@cython.cdivision(True)
+cdef double _walker_collision_time(
+    double moving_x,
+    double moving_y,
+    double move_x,
+    double move_y,
+    double radius,
+    double** cell_coords,
+    Py_ssize_t* cell_sizes,
+    double cell_size,
+    Py_ssize_t cells_per_row
+) nogil:
+    cdef double time = 2.0
+    cdef double time_to_collision, distance_between_particles
+    cdef double center_x = moving_x + move_x / 2
+    cdef double center_y = moving_y + move_y / 2
+    cdef double area_check_radius = sqrt(move_x * move_x + move_y * move_y) / 2 + 1.5 * radius
+    cdef double move_range = (2 * radius + (move_x * move_x + move_y * move_y)) ** 2
+    cdef double r2 = 4 * radius * radius
+    cdef Py_ssize_t x, y, cell, j
+    cdef double* coords
+    cdef Py_ssize_t x_min = <Py_ssize_t>floor((center_x - area_check_radius) / cell_size)
+    cdef Py_ssize_t x_max = <Py_ssize_t>floor((center_x + area_check_radius) / cell_size)
+    cdef Py_ssize_t y_min = <Py_ssize_t>floor((center_y - area_check_radius) / cell_size)
+    cdef Py_ssize_t y_max = <Py_ssize_t>floor((center_y + area_check_radius) / cell_size)
+
+    x_min = max(x_min, 0)
+    y_min = max(y_min, 0)
+    x_max = min(x_max, cells_per_row - 1)
+    y_max = min(y_max, cells_per_row - 1)
+
+    for y in range(y_min, y_max + 1):
+        for x in range(x_min, x_max + 1):
+            cell = x + y * cells_per_row
+            if not cell_sizes[cell]:
+                continue
+
+            if not _circle_square_collision(
+                x * cell_size,
+                y * cell_size,
+                center_x,
+                center_y,
+                cell_size,
+                area_check_radius
+            ):
+                continue
+
+            coords = cell_coords[cell]
+            for j in range(cell_sizes[cell]):
+                distance_between_particles = (
+                    (moving_x - coords[2 * j]) ** 2 +
+                    (moving_y - coords[2 * j + 1]) ** 2
+                )
+                if distance_between_particles <= move_range:
+                    time_to_collision = _calc_collision_time(
+                        coords[2 * j], coords[2 * j + 1],
+                        moving_x, moving_y,
+                        move_x, move_y,
+                        radius
+                    )
+                    if time_to_collision < 0 and distance_between_particles >= r2:
+                        continue
+                    time = min(time_to_collision, time)
+    return time
+
+
+@cython.cdivision(True)
+cdef double _walker_clearance(
+    double moving_x,
+    double moving_y,
+    double radius,
+    double** cell_coords,
+    Py_ssize_t* cell_sizes,
+    double cell_size,
+    Py_ssize_t cells_per_row,
+    Py_ssize_t reach
+) nogil:
+    cdef Py_ssize_t x, y, cell, j
+    cdef double* coords
+    cdef Py_ssize_t x_center = <Py_ssize_t>floor(moving_x / cell_size)
+    cdef Py_ssize_t y_center = <Py_ssize_t>floor(moving_y / cell_size)
+    # Particles outside of searched cells are further than their border
+    cdef double distance = min(
+        min(
+            moving_x - (x_center - reach) * cell_size,
+            (x_center + reach + 1) * cell_size - moving_x
+        ),
+        min(
+            moving_y - (y_center - reach) * cell_size,
+            (y_center + reach + 1) * cell_size - moving_y
+        )
+    )
+    cdef double distance_squared = distance * distance
+
+    for y in range(max(y_center - reach, 0), min(y_center + reach, cells_per_row - 1) + 1):
+        for x in range(max(x_center - reach, 0), min(x_center + reach, cells_per_row - 1) + 1):
+            cell = x + y * cells_per_row
+            coords = cell_coords[cell]
+            for j in range(cell_sizes[cell]):
+                distance_squared = min(
+                    distance_squared,
+                    (moving_x - coords[2 * j]) ** 2 +
+                    (moving_y - coords[2 * j + 1]) ** 2
+                )
+    return sqrt(distance_squared) - 2 * radius
+
+
+@cython.cdivision(True)
+cdef double _empty_block_distance(
+    double x,
+    double y,
+    double cell_size,
+    np.uint8_t* occupied,
+    Py_ssize_t* offsets,
+    Py_ssize_t* sizes,
+    Py_ssize_t levels
+) nogil:
+    # Distance to the border of the largest empty block containing point,
+    # `-size of the plane` when its cell is occupied
+    cdef Py_ssize_t cell_x = <Py_ssize_t>floor(x / cell_size)
+    cdef Py_ssize_t cell_y = <Py_ssize_t>floor(y / cell_size)
+    cdef Py_ssize_t k, block_x, block_y
+    cdef double size
+
+    if cell_x < 0 or cell_y < 0 or cell_x >= sizes[0] or cell_y >= sizes[0]:
+        return -cell_size * sizes[0]
+
+    for k in range(levels - 1, -1, -1):
+        block_x = cell_x >> k
+        block_y = cell_y >> k
+        if not occupied[offsets[k] + block_x + block_y * sizes[k]]:
+            size = cell_size * (1 << k)
+            return min(
+                min(x - block_x * size, (block_x + 1) * size - x),
+                min(y - block_y * size, (block_y + 1) * size - y)
+            )
+    return -cell_size * sizes[0]
+
+
+cdef class CollisionCells:
+    """Coordinates of particles used for collision detection, grouped by
+    cells of size `cell_size` of the main plane.
+
+    Pointer to buffer of `array` of every cell and number of its particles
+    are kept in C arrays and refreshed by `update`, when particles are
+    added to the cell, so collision queries read them directly.
+
+    Level `k` of occupancy pyramid marks blocks of 2^k x 2^k cells
+    containing any particle. It's updated, when cell gets its first
+    particle, and used for clearances of walkers.
+    """
+
+    cdef readonly double plane_size, cell_size, radius
+    cdef readonly Py_ssize_t cells_per_row
+    # Arrays of cells, kept alive while their buffers are used
+    cdef list _coords
+    cdef double** _cell_coords
+    cdef Py_ssize_t* _cell_sizes
+    # Levels of occupancy take less than 2 * number of cells + 64 bytes
+    cdef np.uint8_t* _occupied
+    cdef Py_ssize_t[64] _level_offsets, _level_sizes
+    cdef Py_ssize_t _levels
+
+    def __cinit__(self, double plane_size, double cell_size, double radius):
+        cdef Py_ssize_t i, k = 0, n
+        cdef Py_ssize_t cells_per_row = <Py_ssize_t>(plane_size / cell_size)
+        cdef Py_ssize_t num_of_cells = cells_per_row * cells_per_row
+        self.plane_size = plane_size
+        self.cell_size = cell_size
+        self.radius = radius
+        self.cells_per_row = cells_per_row
+        self._coords = [None] * num_of_cells
+        self._cell_coords = <double**>PyMem_Malloc(num_of_cells * sizeof(double*))
+        self._cell_sizes = <Py_ssize_t*>PyMem_Malloc(num_of_cells * sizeof(Py_ssize_t))
+        self._occupied = <np.uint8_t*>PyMem_Malloc(2 * num_of_cells + 64)
+        if not self._cell_coords or not self._cell_sizes or not self._occupied:
+            raise MemoryError()
+        for i in range(num_of_cells):
+            self._cell_coords[i] = NULL
+            self._cell_sizes[i] = 0
+
+        n = cells_per_row
+        self._level_offsets[0] = 0
+        self._level_sizes[0] = n
+        while n > 1:
+            self._level_offsets[k + 1] = self._level_offsets[k] + n * n
+            self._level_sizes[k + 1] = (n + 1) // 2
+            n = self._level_sizes[k + 1]
+            k += 1
+        self._levels = k + 1
+        for i in range(self._level_offsets[k] + n * n):
+            self._occupied[i] = 0
+
+    def __dealloc__(self):
+        PyMem_Free(self._cell_coords)
+        PyMem_Free(self._cell_sizes)
+        PyMem_Free(self._occupied)
+
+    cpdef void update(self, Py_ssize_t cell, array.array coords):
+        """Refreshes cell after particles were appended to its `coords`
+        (appending can move buffer of `array`)."""
+        cdef Py_ssize_t k, block
+        cdef Py_ssize_t x = cell % self.cells_per_row
+        cdef Py_ssize_t y = cell // self.cells_per_row
+        self._coords[cell] = coords
+        self._cell_coords[cell] = coords.data.as_doubles
+        self._cell_sizes[cell] = len(coords) // 2
+        if not self._cell_sizes[cell]:
+            return
+
+        for k in range(self._levels):
+            block = self._level_offsets[k] + (x >> k) + (y >> k) * self._level_sizes[k]
+            # Blocks above occupied block are occupied
+            if self._occupied[block]:
+                break
+            self._occupied[block] = 1
+
+    cpdef np.ndarray collision_times(
+        self,
+        double[:, ::1] moving_parts,
+        double[:, ::1] move_vecs,
+        int num_threads=1,
+        double[::1] clearances=None
+    ):
+        return _cells_collision_times(
+            [self], None, moving_parts, move_vecs, num_threads, clearances
+        )
+
+
+cdef np.ndarray _cells_collision_times(
+    list cells_list,
+    int[::1] owners,
+    double[:, ::1] moving_parts,
+    double[:, ::1] move_vecs,
+    int num_threads,
+    double[::1] clearances
+):
+    cdef Py_ssize_t size = moving_parts.shape[0]
+    cdef Py_ssize_t num_of_cells = len(cells_list)
+    cdef Py_ssize_t i
+    cdef int owner
+    cdef bint use_owners = owners is not None
+    cdef bint use_clearances = clearances is not None
+    cdef double clearance
+    cdef CollisionCells cells = cells_list[0]
+    cdef double radius = cells.radius
+    cdef double cell_size = cells.cell_size
+    cdef Py_ssize_t cells_per_row = cells.cells_per_row
+    # Levels of occupancy are the same for cells of the same size
+    cdef Py_ssize_t* level_offsets = cells._level_offsets
+    cdef Py_ssize_t* level_sizes = cells._level_sizes
+    cdef Py_ssize_t levels = cells._levels
+
+    # Coordinates of particles of every collision plane, read directly from
+    # their buffers, grouped by cells of a flat grid, for every owner, so
+    # walkers of all of them are checked in one parallel loop
+    cdef double*** cell_coords = <double***>PyMem_Malloc(num_of_cells * sizeof(double**))
+    cdef Py_ssize_t** cell_sizes = <Py_ssize_t**>PyMem_Malloc(num_of_cells * sizeof(Py_ssize_t*))
+    cdef np.uint8_t** occupied = <np.uint8_t**>PyMem_Malloc(num_of_cells * sizeof(np.uint8_t*))
+    if not cell_coords or not cell_sizes or not occupied:
+        PyMem_Free(cell_coords)
+        PyMem_Free(cell_sizes)
+        PyMem_Free(occupied)
+        raise MemoryError()
+
+    for i in range(num_of_cells):
+        cells = cells_list[i]
+        cell_coords[i] = cells._cell_coords
+        cell_sizes[i] = cells._cell_sizes
+        occupied[i] = cells._occupied
+
+    # NaN marks particle, which is already stuck
+    cdef np.uint8_t[::1] active = (~np.isnan(np.asarray(moving_parts)[:, 0])).view(np.uint8)
+
+    cdef np.ndarray out = np.full(size, 2.0, dtype=np.double)
+    cdef double[::1] times = out
+
+    # Every walker writes only its own time, so results don't depend on
+    # number of threads
+    try:
+        for i in prange(size, nogil=True, num_threads=num_threads, schedule='static'):
+            if not active[i]:
+                continue
+            # Walker can't reach any particle during its move
+            if use_clearances and clearances[i] > sqrt(
+                move_vecs[i, 0] * move_vecs[i, 0] + move_vecs[i, 1] * move_vecs[i, 1]
+            ):
+                continue
+
+            owner = owners[i] if use_owners else 0
+            times[i] = _walker_collision_time(
+                moving_parts[i, 0], moving_parts[i, 1],
+                move_vecs[i, 0], move_vecs[i, 1],
+                radius,
+                cell_coords[owner],
+                cell_sizes[owner],
+                cell_size,
+                cells_per_row
+            )
+            if use_clearances:
+                # Circles of particles don't touch empty blocks of cells
+                clearance = _empty_block_distance(
+                    moving_parts[i, 0],
+                    moving_parts[i, 1],
+                    cell_size,
+                    occupied[owner],
+                    level_offsets,
+                    level_sizes,
+                    levels
+                ) - radius
+                # Close to particles neighbouring cells give better bound
+                if clearance < cell_size:
+                    clearance = max(clearance, _walker_clearance(
+                        moving_parts[i, 0], moving_parts[i, 1],
+                        radius,
+                        cell_coords[owner],
+                        cell_sizes[owner],
+                        cell_size,
+                        cells_per_row,
+                        1
+                    ))
+                clearances[i] = clearance
+    finally:
+        PyMem_Free(cell_coords)
+        PyMem_Free(cell_sizes)
+        PyMem_Free(occupied)
+
+    return out
+
+
+def collision_cells_collision_times(
+    list cells,
+    int[::1] owners,
+    double[:, ::1] moving_parts,
+    double[:, ::1] move_vecs,
+    int num_threads=1,
+    double[::1] clearances=None
+):
+    """Same as `CollisionCells.collision_times`, but for walkers of many
+    simulations at once. Walker `i` collides with particles kept in
+    `cells[owners[i]]`. All of them must have the same plane size, cell
+    size and radius."""
+    return _cells_collision_times(
+        cells, owners, moving_parts, move_vecs, num_threads, clearances
+    )
+
+
+cpdef void update_steps(
+    double[:, ::1] last_step,
+    double[::1] step_len,
+    double[:, ::1] noise,
+    double alpha,
+    double beta
+):
+    """
+    Sets `last_step` to `beta * last_step + alpha * noise` and `step_len`
+    to its length, in place.
+    """
+    cdef Py_ssize_t i
+    cdef double x, y
+
+    with nogil:
+        for i in range(last_step.shape[0]):
+            x = beta * last_step[i, 0] + alpha * noise[i, 0]
+            y = beta * last_step[i, 1] + alpha * noise[i, 1]
+            last_step[i, 0] = x
+            last_step[i, 1] = y
+            step_len[i] = sqrt(x * x + y * y)
+
+
+cpdef void move_walkers(
+    double[:, ::1] pos,
+    double[:, ::1] last_step,
+    double[::1] step_len,
+    double[::1] clearances,
+    double low,
+    double high
+):
+    """
+    Moves walkers by their steps in place. Walker, which reaches a border,
+    is stopped on it and its step is reversed along that axis.
+    """
+    cdef Py_ssize_t i, j
+    cdef double p
+
+    with nogil:
+        for i in range(pos.shape[0]):
+            for j in range(2):
+                p = pos[i, j] + last_step[i, j]
+                if p <= low:
+                    p = low
+                    last_step[i, j] = -last_step[i, j]
+                elif p >= high:
+                    p = high
+                    last_step[i, j] = -last_step[i, j]
+                pos[i, j] = p
+            clearances[i] -= step_len[i]
+
+
+cdef inline bint _is_in_circle(
+    double x,
+    double y,
+    double particle_x,
+    double particle_y,
+    double size,
+    double radius
+) nogil:
+    cdef double r_squared = radius * radius
+    cdef double dX, dY
+    cdef int i
+    for i in range(4):
+        dX = x + size * (i & 0b1) - particle_x
+        dY = y + size * ((i & 0b10) >> 1) - particle_y
+        if dX * dX + dY * dY > r_squared:
+            return False
+    return True
+
+
+cdef enum:
+    # Missing sub plane
+    NO_PLANE = -1
+    # Occupied quarter of the smallest plane, it has no planes below it
+    OCCUPIED = 0
+
+
+cdef class NodePool:
+    """Quadtree of `Plane` and its neighbours stored in contiguous arrays.
+
+    Node `0` is the main plane, nodes `1-8` are its neighbours, in the same
+    order as `Plane.neighbours`. Every node keeps indices of its four sub
+    planes (`-1` when missing), position of its upper left corner, its size
+    and whether it's full. Nodes of size `second_min_box_size` mark occupied
+    quarters with `0`.
+
+    Coordinates of particles used for collision detection are kept in
+    `coords`, one `array` per cell of size `particle_plane_size` of the main
+    plane, unless `keep_coords` is `False`. Their buffers are kept in
+    `cells`, which collision queries read.
+
+    Number of boxes of every size is kept in `counts`, updated when node is
+    created or becomes full.
+    """
+
+    cdef readonly np.ndarray children, start, size, full, can_be_full
+    cdef int[:, ::1] _children
+    cdef double[:, ::1] _start
+    cdef double[::1] _size
+    cdef np.uint8_t[::1] _full, _can_be_full
+    cdef readonly Py_ssize_t count
+    cdef list _free
+    cdef readonly double plane_size, particle_plane_size, second_min_box_size, min_box_size, radius
+    cdef readonly Py_ssize_t cells_per_row
+    cdef readonly list coords
+    cdef readonly CollisionCells cells
+    cdef readonly bint keep_coords
+    cdef readonly np.ndarray counts
+    cdef np.int64_t[::1] _counts
+
+    def __init__(
+        self,
+        double plane_size,
+        double particle_plane_size,
+        double second_min_box_size,
+        double min_box_size,
+        double radius,
+        bint keep_coords=True,
+        Py_ssize_t capacity=1024
+    ):
+        cdef int i
+        cdef double[::1] coords = np.array((-plane_size, -plane_size), dtype=np.double)
+
+        self.plane_size = plane_size
+        self.particle_plane_size = particle_plane_size
+        self.second_min_box_size = second_min_box_size
+        self.min_box_size = min_box_size
+        self.radius = radius
+        self.keep_coords = keep_coords
+        self.counts = np.zeros(
+            <Py_ssize_t>round(np.log2(plane_size / min_box_size)), dtype=np.int64
+        )
+        self._counts = self.counts
+        self.cells_per_row = <Py_ssize_t>(plane_size / particle_plane_size)
+        self.coords = [None] * (self.cells_per_row * self.cells_per_row)
+        self.cells = CollisionCells(plane_size, particle_plane_size, radius)
+        self.count = 0
+        self._free = []
+        self._allocate(max(capacity, 9))
+
+        self._new_node(0, 0, plane_size, False)
+        for i in range(3):
+            self._new_node(
+                coords[0] + plane_size * (i & 0b1),
+                coords[1] + plane_size * ((i & 0b10) >> 1),
+                plane_size,
+                True
+            )
+        for i in range(1, 4):
+            self._new_node(
+                plane_size * (i & 0b1),
+                plane_size * ((i & 0b10) >> 1),
+                plane_size,
+                True
+            )
+        self._new_node(plane_size, -plane_size, plane_size, True)
+        self._new_node(-plane_size, plane_size, plane_size, True)
+
+    cdef void _allocate(self, Py_ssize_t capacity):
+        cdef np.ndarray children = np.full((capacity, 4), NO_PLANE, dtype=np.intc)
+        cdef np.ndarray start = np.zeros((capacity, 2), dtype=np.double)
+        cdef np.ndarray size = np.zeros(capacity, dtype=np.double)
+        cdef np.ndarray full = np.zeros(capacity, dtype=np.uint8)
+        cdef np.ndarray can_be_full = np.zeros(capacity, dtype=np.uint8)
+
+        if self.count:
+            children[:self.count] = self.children[:self.count]
+            start[:self.count] = self.start[:self.count]
+            size[:self.count] = self.size[:self.count]
+            full[:self.count] = self.full[:self.count]
+            can_be_full[:self.count] = self.can_be_full[:self.count]
+
+        self.children = children
+        self.start = start
+        self.size = size
+        self.full = full
+        self.can_be_full = can_be_full
+        self._children = children
+        self._start = start
+        self._size = size
+        self._full = full
+        self._can_be_full = can_be_full
+
+    cdef int _new_node(self, double x, double y, double size, bint can_be_full):
+        cdef int node
+        if self._free:
+            node = self._free.pop()
+        else:
+            if self.count == self._size.shape[0]:
+                self._allocate(2 * self.count)
+            node = self.count
+            self.count += 1
+
+        self._children[node, :] = NO_PLANE
+        self._start[node, 0] = x
+        self._start[node, 1] = y
+        self._size[node] = size
+        self._full[node] = False
+        self._can_be_full[node] = can_be_full
+        return node
+
+    cdef inline Py_ssize_t _level(self, double size):
+        """Index in `counts` of boxes of given size."""
+        return <Py_ssize_t>(log2(self.plane_size / size) + 0.5) - 1
+
+    cdef void _set_full(self, int node):
+        cdef Py_ssize_t level = self._level(self._size[node] / 2)
+        # Boxes of sub planes are replaced by all boxes of full node
+        self._count(node, level, self._counts, -1)
+        self._full[node] = True
+        self._count(node, level, self._counts, 1)
+        self._release_sub_planes(node)
+
+    cdef void _release_sub_planes(self, int node):
+        cdef int i, child
+        if self._size[node] == self.second_min_box_size:
+            return
+
+        for i in range(4):
+            child = self._children[node, i]
+            if child != NO_PLANE:
+                self._release_sub_planes(child)
+                self._children[node, i] = NO_PLANE
+                self._free.append(child)
+
+    cdef bint _is_full(self, int node):
+        cdef int i, child
+        if self._full[node]:
+            return True
+
+        for i in range(4):
+            child = self._children[node, i]
+            if child == NO_PLANE or not self._full[child]:
+                return False
+        return True
+
+    cdef void _add_point(self, int node, double particle_x, double particle_y):
+        cdef double x = self._start[node, 0], y = self._start[node, 1]
+        cdef double size = self._size[node]
+        cdef double half = size / 2
+        cdef int[4] sub_planes
+        cdef int num_of_sub_planes = 0
+        cdef int i, j, child
+        cdef Py_ssize_t cell
+
+        if not self._full[node]:
+            if self._can_be_full[node] and _is_in_circle(x, y, particle_x, particle_y, size, self.radius):
+                self._set_full(node)
+            else:
+                for i in range(4):
+                    if _circle_square_collision(
+                        x + half * (i & 0b1),
+                        y + half * ((i & 0b10) >> 1),
+                        particle_x,
+                        particle_y,
+                        half,
+                        self.radius
+                    ):
+                        sub_planes[num_of_sub_planes] = i
+                        num_of_sub_planes += 1
+
+                if size == self.second_min_box_size:
+                    for j in range(num_of_sub_planes):
+                        if self._children[node, sub_planes[j]] == NO_PLANE:
+                            self._children[node, sub_planes[j]] = OCCUPIED
+                            self._counts[self._level(half)] += 1
+                    for i in range(4):
+                        if self._children[node, i] == NO_PLANE:
+                            break
+                    else:
+                        self._set_full(node)
+                else:
+                    for j in range(num_of_sub_planes):
+                        i = sub_planes[j]
+                        child = self._children[node, i]
+                        if child == NO_PLANE:
+                            # Pool can be reallocated, when new node is created
+                            child = self._new_node(
+                                x + half * (i & 0b1),
+                                y + half * ((i & 0b10) >> 1),
+                                half,
+                                self._can_be_full[node] or half <= self.particle_plane_size
+                            )
+                            self._children[node, i] = child
+                            self._counts[self._level(half)] += 1
+                        self._add_point(child, particle_x, particle_y)
+
+                    if self._can_be_full[node] and self._is_full(node):
+                        self._set_full(node)
+
+        if (
+            self.keep_coords and
+            size == self.particle_plane_size and
+            0 <= x < self.plane_size and
+            0 <= y < self.plane_size
+        ):
+            cell = <Py_ssize_t>(x / size) + <Py_ssize_t>(y / size) * self.cells_per_row
+            if self.coords[cell] is None:
+                self.coords[cell] = array.array('d')
+            self.coords[cell].append(particle_x)
+            self.coords[cell].append(particle_y)
+            self.cells.update(cell, self.coords[cell])
+
+    def add_point(self, double[::1] particle):
+        cdef int i
+        cdef array.array colliding
+
+        self._add_point(0, particle[0], particle[1])
+
+        colliding = check_particle_outside_plane(particle, self.radius, self.plane_size)
+        if not colliding[8]:
+            return
+
+        for i in range(8):
+            if colliding[i]:
+                self._add_point(i + 1, particle[0], particle[1])
+
+    cdef void _count(self, int node, Py_ssize_t level, np.int64_t[::1] counts, int sign):
+        """Adds boxes of node and its sub planes to `counts` (subtracts them,
+        when `sign` is `-1`)."""
+        cdef int i, child
+        cdef np.int64_t boxes = 4
+
+        if self._full[node]:
+            for i in range(level, counts.shape[0]):
+                counts[i] += sign * boxes
+                boxes *= 4
+            return
+
+        for i in range(4):
+            if self._children[node, i] != NO_PLANE:
+                counts[level] += sign
+
+        if self._size[node] == self.second_min_box_size:
+            return
+
+        for i in range(4):
+            child = self._children[node, i]
+            if child != NO_PLANE:
+                self._count(child, level + 1, counts, sign)
+
+    cpdef np.ndarray count_boxes(self):
+        """Number of boxes of every size, starting from `plane_size / 2` down
+        to `min_box_size`."""
+        return self.counts.copy()
+
+    cpdef np.ndarray collision_times(
+        self,
+        double[:, ::1] moving_parts,
+        double[:, ::1] move_vecs,
+        int num_threads=1,
+        double[::1] clearances=None
+    ):
+        return self.cells.collision_times(
+            moving_parts, move_vecs, num_threads, clearances
+        )
+
+
+@cython.cdivision(True)
+cdef double _cell_list_collision_time(
+    double moving_x,
+    double moving_y,
+    double move_x,
+    double move_y,
+    double radius,
+    const double* stuck_points,
+    const int* head,
+    const int* next_part,
+    double cell_size,
+    Py_ssize_t cells_per_row
+) nogil:
+    cdef double time = 2.0
+    cdef double time_to_collision, distance_between_particles
+    cdef double move_range = (2 * radius + (move_x * move_x + move_y * move_y)) ** 2
+    cdef double r2 = 4 * radius * radius
+    cdef Py_ssize_t x, y
+    cdef int part
+    # Only particles closer than 2 * radius to path of moving particle
+    # can collide with it
+    cdef Py_ssize_t x_min = <Py_ssize_t>floor((min(moving_x, moving_x + move_x) - 2 * radius) / cell_size)
+    cdef Py_ssize_t x_max = <Py_ssize_t>floor((max(moving_x, moving_x + move_x) + 2 * radius) / cell_size)
+    cdef Py_ssize_t y_min = <Py_ssize_t>floor((min(moving_y, moving_y + move_y) - 2 * radius) / cell_size)
+    cdef Py_ssize_t y_max = <Py_ssize_t>floor((max(moving_y, moving_y + move_y) + 2 * radius) / cell_size)
+
+    x_min = min(max(x_min, 0), cells_per_row - 1)
+    y_min = min(max(y_min, 0), cells_per_row - 1)
+    x_max = min(max(x_max, 0), cells_per_row - 1)
+    y_max = min(max(y_max, 0), cells_per_row - 1)
+
+    for y in range(y_min, y_max + 1):
+        for x in range(x_min, x_max + 1):
+            part = head[x + y * cells_per_row]
+            while part != NO_PLANE:
+                distance_between_particles = (
+                    (moving_x - stuck_points[2 * part]) ** 2 +
+                    (moving_y - stuck_points[2 * part + 1]) ** 2
+                )
+                if distance_between_particles <= move_range:
+                    time_to_collision = _calc_collision_time(
+                        stuck_points[2 * part], stuck_points[2 * part + 1],
+                        moving_x, moving_y,
+                        move_x, move_y,
+                        radius
+                    )
+                    if not (time_to_collision < 0 and distance_between_particles >= r2):
+                        time = min(time_to_collision, time)
+                part = next_part[part]
+    return time
+
+
+cdef enum:
+    # Number of cells of `CellList` searched in every direction, when
+    # clearance of walker is refreshed
+    CLEARANCE_CELLS = 3
+
+
+@cython.cdivision(True)
+cdef double _cell_list_clearance(
+    double moving_x,
+    double moving_y,
+    double radius,
+    const double* stuck_points,
+    const int* head,
+    const int* next_part,
+    double cell_size,
+    Py_ssize_t cells_per_row,
+    Py_ssize_t reach
+) nogil:
+    cdef Py_ssize_t x, y
+    cdef int part
+    cdef Py_ssize_t x_center = <Py_ssize_t>floor(moving_x / cell_size)
+    cdef Py_ssize_t y_center = <Py_ssize_t>floor(moving_y / cell_size)
+    # Particles outside of searched cells are further than their border
+    cdef double distance = min(
+        min(
+            moving_x - (x_center - reach) * cell_size,
+            (x_center + reach + 1) * cell_size - moving_x
+        ),
+        min(
+            moving_y - (y_center - reach) * cell_size,
+            (y_center + reach + 1) * cell_size - moving_y
+        )
+    )
+    cdef double distance_squared = distance * distance
+
+    for y in range(max(y_center - reach, 0), min(y_center + reach, cells_per_row - 1) + 1):
+        for x in range(max(x_center - reach, 0), min(x_center + reach, cells_per_row - 1) + 1):
+            part = head[x + y * cells_per_row]
+            while part != NO_PLANE:
+                distance_squared = min(
+                    distance_squared,
+                    (moving_x - stuck_points[2 * part]) ** 2 +
+                    (moving_y - stuck_points[2 * part + 1]) ** 2
+                )
+                part = next_part[part]
+    return sqrt(distance_squared) - 2 * radius
+
+
+cdef class CellList:
+    """Uniform grid of stuck particles used for collision detection.
+
+    Every particle is stored in the cell containing its center (particles
+    outside of the plane go to the closest cell). Particles of every cell
+    form linked list: `head` keeps first particle of every cell,
+    `next_part` - next particle in the same cell (`-1` ends the list).
+    """
+
+    cdef readonly np.ndarray head, next_part
+    cdef int[::1] _head, _next_part
+    cdef readonly double plane_size, cell_size, radius
+    cdef readonly Py_ssize_t cells_per_row
+
+    def __init__(
+        self,
+        double plane_size,
+        double cell_size,
+        double radius,
+        Py_ssize_t capacity=1024
+    ):
+        self.plane_size = plane_size
+        self.cell_size = cell_size
+        self.radius = radius
+        self.cells_per_row = <Py_ssize_t>ceil(plane_size / cell_size)
+        self.head = np.full(self.cells_per_row * self.cells_per_row, NO_PLANE, dtype=np.intc)
+        self.next_part = np.full(max(capacity, 1), NO_PLANE, dtype=np.intc)
+        self._head = self.head
+        self._next_part = self.next_part
+
+    @cython.cdivision(True)
+    def add_point(self, double[::1] particle, int point):
+        cdef Py_ssize_t x = <Py_ssize_t>floor(particle[0] / self.cell_size)
+        cdef Py_ssize_t y = <Py_ssize_t>floor(particle[1] / self.cell_size)
+        cdef Py_ssize_t cell
+        cdef np.ndarray next_part
+
+        if point >= self._next_part.shape[0]:
+            next_part = np.full(2 * point, NO_PLANE, dtype=np.intc)
+            next_part[:self._next_part.shape[0]] = self.next_part
+            self.next_part = next_part
+            self._next_part = next_part
+
+        x = min(max(x, 0), self.cells_per_row - 1)
+        y = min(max(y, 0), self.cells_per_row - 1)
+        cell = x + y * self.cells_per_row
+        self._next_part[point] = self._head[cell]
+        self._head[cell] = point
+
+    cpdef np.ndarray collision_times(
+        self,
+        double[:, ::1] stuck_points,
+        double[:, ::1] moving_parts,
+        double[:, ::1] move_vecs,
+        int num_threads=1,
+        double[::1] clearances=None
+    ):
+        return _cell_lists_collision_times(
+            [self], [stuck_points], None,
+            moving_parts, move_vecs, num_threads, clearances
+        )
+
+
+cdef np.ndarray _cell_lists_collision_times(
+    list cell_lists,
+    list stuck_points,
+    int[::1] owners,
+    double[:, ::1] moving_parts,
+    double[:, ::1] move_vecs,
+    int num_threads,
+    double[::1] clearances
+):
+    cdef Py_ssize_t size = moving_parts.shape[0]
+    cdef Py_ssize_t num_of_lists = len(cell_lists)
+    cdef Py_ssize_t i
+    cdef int owner
+    cdef bint use_owners = owners is not None
+    cdef bint use_clearances = clearances is not None
+    cdef Py_ssize_t reach = CLEARANCE_CELLS
+    cdef CellList cell_list = cell_lists[0]
+    cdef double radius = cell_list.radius
+    cdef double cell_size = cell_list.cell_size
+    cdef Py_ssize_t cells_per_row = cell_list.cells_per_row
+    cdef double[:, ::1] points
+
+    # Buffers of every cell list and its stuck particles, so walkers of
+    # all of them are checked in one parallel loop
+    cdef double** points_data = <double**>PyMem_Malloc(num_of_lists * sizeof(double*))
+    cdef int** head_data = <int**>PyMem_Malloc(num_of_lists * sizeof(int*))
+    cdef int** next_part_data = <int**>PyMem_Malloc(num_of_lists * sizeof(int*))
+    if not points_data or not head_data or not next_part_data:
+        PyMem_Free(points_data)
+        PyMem_Free(head_data)
+        PyMem_Free(next_part_data)
+        raise MemoryError()
+
+    for i in range(num_of_lists):
+        cell_list = cell_lists[i]
+        points = stuck_points[i]
+        points_data[i] = &points[0, 0]
+        head_data[i] = &cell_list._head[0]
+        next_part_data[i] = &cell_list._next_part[0]
+
+    # NaN marks particle, which is already stuck
+    cdef np.uint8_t[::1] active = (~np.isnan(np.asarray(moving_parts)[:, 0])).view(np.uint8)
+    cdef np.ndarray out = np.full(size, 2.0, dtype=np.double)
+    cdef double[::1] times = out
+
+    try:
+        for i in prange(size, nogil=True, num_threads=num_threads, schedule='static'):
+            if not active[i]:
+                continue
+            # Walker can't reach any particle during its move
+            if use_clearances and clearances[i] > sqrt(
+                move_vecs[i, 0] * move_vecs[i, 0] + move_vecs[i, 1] * move_vecs[i, 1]
+            ):
+                continue
+
+            owner = owners[i] if use_owners else 0
+            times[i] = _cell_list_collision_time(
+                moving_parts[i, 0], moving_parts[i, 1],
+                move_vecs[i, 0], move_vecs[i, 1],
+                radius,
+                points_data[owner],
+                head_data[owner],
+                next_part_data[owner],
+                cell_size,
+                cells_per_row
+            )
+            if use_clearances:
+                clearances[i] = _cell_list_clearance(
+                    moving_parts[i, 0], moving_parts[i, 1],
+                    radius,
+                    points_data[owner],
+                    head_data[owner],
+                    next_part_data[owner],
+                    cell_size,
+                    cells_per_row,
+                    reach
+                )
+    finally:
+        PyMem_Free(points_data)
+        PyMem_Free(head_data)
+        PyMem_Free(next_part_data)
+
+    return out
+
+
+def cell_lists_collision_times(
+    list cell_lists,
+    list stuck_points,
+    int[::1] owners,
+    double[:, ::1] moving_parts,
+    double[:, ::1] move_vecs,
+    int num_threads=1,
+    double[::1] clearances=None
+):
+    """Same as `CellList.collision_times`, but for walkers of many
+    simulations at once. Walker `i` collides with `stuck_points[owners[i]]`
+    kept in `cell_lists[owners[i]]`. All cell lists must have the same
+    plane size, cell size and radius."""
+    return _cell_lists_collision_times(
+        cell_lists, stuck_points, owners,
+        moving_parts, move_vecs, num_threads, clearances
+    )
@@ -0,0 +1,97 @@
+"""Compare collision engines: quadtree with collision planes of size
+`particle_collision_plane_size` and uniform grid of stuck particles.
+
+Cluster is grown with quadtree engine, then both engines answer the same
+collision queries for the current walkers.
+"""
+from __future__ import annotations
+
+import timeit
+from typing import Optional
+
+import click
+import numpy as np
+
+import DLA
+from DLA.__main__ import load_config
+
+
+@click.command()
+@click.option(
+    '-s', '--steps',
+    default=1000, type=int, show_default=True,
+    help='number of simulation steps used to grow the cluster'
+)
+@click.option(
+    '-r', '--repeat',
+    default=200, type=int, show_default=True,
+    help='number of timed queries for every engine'
+)
+@click.argument(
+    'config',
+    required=False,
+    type=click.Path(exists=True, dir_okay=False, resolve_path=True)
+)
+def main(steps: int, repeat: int, config: Optional[str]) -> None:
+    config_dict = load_config(config, 'DLA', 'config.yml')
+    config_dict['display']['use_pygame'] = False  # type: ignore
+    config_dict['planes']['collision_engine'] = 'quadtree'  # type: ignore
+    setattr(DLA, 'config_dict', config_dict)
+
+    from DLA.config import Config
+    from DLA.exceptions import StopSimulation
+    from DLA.plane import Plane
+    from DLA.utils import CellList
+
+    sim_config = Config(config_dict)  # type: ignore
+    plane = Plane.new(sim_config)
+    try:
+        for _ in range(steps):
+            plane.update()
+    except StopSimulation:
+        pass
+
+    stuck = plane._stuck_points
+    walkers = plane._walking_points
+    cell_list = CellList(
+        plane.size, sim_config.cell_size, sim_config.radius, stuck.filled
+    )
+    for i, point in enumerate(stuck):
+        cell_list.add_point(point, i)
+
+    walkers.walk()
+    pos, last_step = walkers.pos, walkers.last_step
+
+    quadtree = plane.collision_times(pos, last_step)
+    grid = cell_list.collision_times(
+        stuck.view, pos, last_step, sim_config.threads
+    )
+    colliding = quadtree <= 1
+    assert np.array_equal(colliding, grid <= 1)
+    assert np.array_equal(quadtree[colliding], grid[colliding])
+
+    click.echo(
+        f'stuck particles: {stuck.filled}, '
+        f'walking particles: {int((~np.isnan(pos[:, 0])).sum())}'
+    )
+    for name, size, query in (
+        (
+            'quadtree', sim_config.particle_plane_size,
+            lambda: plane.collision_times(pos, last_step)
+        ),
+        (
+            'grid', sim_config.cell_size,
+            lambda: cell_list.collision_times(
+                stuck.view, pos, last_step, sim_config.threads
+            )
+        ),
+    ):
+        time = min(timeit.repeat(query, number=repeat // 10, repeat=10))
+        click.echo(
+            f'{name:>8} (cell size {size:g}): '
+            f'{time / (repeat // 10) * 1e3:.3f} ms per query'
+        )
+
+
+if __name__ == '__main__':
+    main()
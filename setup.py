@@ -10,16 +10,20 @@ except ImportError:
 
 ext = '.pyx' if USE_CYTHON else '.c'
 
-MSVC_FLAGS = ['/Ox']
+MSVC_FLAGS = ['/Ox', '/openmp']
 REST_OF_COMPILERS_FLAGS = ['-O3', '-ffast-math']
+# Apple's clang doesn't ship with OpenMP, `prange` falls back to serial loop
+OPENMP_FLAGS = [] if system() == 'Darwin' else ['-fopenmp']
 
 extensions = [
     Extension(
         'DLA.utils',
         [f'DLA/utils{ext}'],
         extra_compile_args=(
-            MSVC_FLAGS if system() == 'Windows' else REST_OF_COMPILERS_FLAGS
-        )
+            MSVC_FLAGS if system() == 'Windows'
+            else REST_OF_COMPILERS_FLAGS + OPENMP_FLAGS
+        ),
+        extra_link_args=[] if system() == 'Windows' else OPENMP_FLAGS,
     )
 ]
 
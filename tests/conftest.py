@@ -0,0 +1,21 @@
+from copy import deepcopy
+from typing import Any, Callable, Dict
+
+import pytest
+
+from DLA.config import Config, config_dict
+
+
+@pytest.fixture
+def make_config() -> Callable[..., Config]:
+    """
+    Returns function building testing configuration, in which sections
+    are updated with given dictionaries.
+    """
+    def make(**sections: Dict[str, Any]) -> Config:
+        config = deepcopy(config_dict)
+        for name, values in sections.items():
+            config[name].update(values)
+        return Config(config)
+
+    return make
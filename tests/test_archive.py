@@ -0,0 +1,50 @@
+import pickle
+
+import numpy as np
+
+from DLA.archive import ResultsArchive
+from DLA.results import dumps
+
+
+def _result(memory: float, seed: int) -> dict:
+    rng = np.random.default_rng(seed)
+    return {
+        'radius': 3.0,
+        'memory': memory,
+        'num_of_iterations': seed,
+        'stuck_particles': rng.uniform(0, 512, (seed + 1, 2)),
+        'num_of_boxes': rng.integers(0, 100, 9),
+    }
+
+
+def test_results_are_read_from_archive(tmp_path) -> None:
+    archive = ResultsArchive(tmp_path / 'archive')
+    results = [_result(memory, i) for i, memory in enumerate(
+        [0.5, -0.5, 0.5, 0.5, -0.5]
+    )]
+    for i, result in enumerate(results):
+        data = dumps(result) if i % 2 else pickle.dumps(result)
+        archive.append(result['memory'], f'/some/dir/{i}.x', data)
+
+    # Interrupted write of index record
+    with open(archive.index_path, 'ab') as f:
+        f.write(b'\0' * 10)
+    assert len(archive.entries()) == 5
+    archive.append(0.5, '5.x', dumps(_result(0.5, 5)))
+    results.append(_result(0.5, 5))
+
+    entries = archive.entries(0.5)
+    assert entries['name'].tolist() == [b'0.x', b'2.x', b'3.x', b'5.x']
+    assert (entries['offset'] % 64 == 0).all()
+    assert archive.read(entries[0]) == pickle.dumps(results[0])
+
+    loaded = archive.load_all(0.5)
+    expected = [results[i] for i in (0, 2, 3, 5)]
+    assert len(loaded) == len(expected)
+    for result, other, entry in zip(loaded, expected, entries):
+        single = archive.load(entry)
+        for name, value in other.items():
+            assert np.array_equal(result[name], value)
+            assert np.array_equal(single[name], value)
+    assert isinstance(loaded[2]['stuck_particles'], np.memmap)
+    assert archive.load_all(0.25) == []
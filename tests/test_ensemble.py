@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from DLA.ensemble import Ensemble
+from DLA.simulation import Simulation
+
+
+@pytest.mark.parametrize('planes, max_leap', [
+    ({'collision_engine': 'grid'}, 1),
+    ({'collision_engine': 'quadtree', 'flat_tree': True}, 1),
+    ({'collision_engine': 'quadtree', 'flat_tree': False}, 1),
+    ({'collision_engine': 'quadtree', 'flat_tree': True}, 16),
+], ids=['grid', 'flat_tree', 'object_tree', 'max_leap'])
+def test_replicas_are_independent_simulations(
+    make_config,
+    planes,
+    max_leap
+) -> None:
+    config = make_config(
+        particles={'num': 400},
+        system={'max_steps': 300, 'seed': 3, 'max_leap': max_leap},
+        planes=planes,
+    )
+    ensemble = Ensemble(config, 3)
+    ensemble.run()
+
+    assert not ensemble.running
+    data = ensemble.get_data()
+    assert len(data) == 3
+    assert sorted(data[0]) == sorted(Simulation(config).get_data())
+    for replica, replica_data in zip(ensemble.replicas, data):
+        assert 0 < replica.num_of_iterations <= 300
+        stuck = replica_data['stuck_particles']
+        assert stuck.shape[0] + replica_data['walking_particles'].shape[0] \
+            == 401
+        assert stuck.shape[0] > 1
+        assert not np.isnan(stuck).any()
+    assert not np.array_equal(
+        data[0]['stuck_particles'], data[1]['stuck_particles']
+    )
+
+
+@pytest.mark.parametrize('max_leap', [1, 16])
+def test_engines_give_the_same_ensemble(make_config, max_leap) -> None:
+    results = []
+    for planes in (
+        {'collision_engine': 'grid'},
+        {'collision_engine': 'quadtree', 'flat_tree': True},
+        {'collision_engine': 'quadtree', 'flat_tree': False},
+    ):
+        ensemble = Ensemble(
+            make_config(
+                particles={'num': 30},
+                system={'max_steps': 300, 'seed': 8, 'max_leap': max_leap},
+                planes=planes,
+            ),
+            2
+        )
+        ensemble.run()
+        results.append(ensemble.get_data())
+
+    for grid, *quadtrees in zip(*results):
+        for quadtree in quadtrees:
+            assert np.array_equal(
+                grid['stuck_particles'], quadtree['stuck_particles']
+            )
+            assert grid['num_of_iterations'] == \
+                quadtree['num_of_iterations']
+
+
+def test_sleeping_walkers_of_ensemble_do_not_move(make_config) -> None:
+    ensemble = Ensemble(
+        make_config(
+            particles={'num': 100},
+            system={'max_steps': 300, 'seed': 5, 'max_leap': 16},
+            planes={'flat_tree': True},
+        ),
+        3
+    )
+    for _ in range(5):
+        ensemble.update()
+    asleep = ensemble._rows('asleep') > 0
+    assert asleep.any() and not asleep.all()
+
+    pos = ensemble._rows('pos').copy()
+    last_step = ensemble._rows('last_step').copy()
+    ensemble.walk()
+    ensemble.finish_walk()
+
+    assert np.array_equal(ensemble._rows('pos')[asleep], pos[asleep])
+    assert np.array_equal(
+        ensemble._rows('last_step')[asleep], last_step[asleep]
+    )
+    assert not np.array_equal(ensemble._rows('pos')[~asleep], pos[~asleep])
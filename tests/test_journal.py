@@ -0,0 +1,35 @@
+from DLA.server import journal
+from DLA.server.journal import DONE, JOURNAL_DTYPE, TIMED_OUT, StateJournal
+
+
+def test_journal_is_replayed(tmp_path) -> None:
+    path = tmp_path / 'journal'
+    state = StateJournal(path)
+    state.append(DONE, 0.5)
+    state.append(TIMED_OUT, 0.5)
+    state.append(DONE, -0.5)
+    state.append(DONE, 0.5)
+    state.close()
+    # Interrupted write
+    with open(path, 'ab') as f:
+        f.write(b'\x00' * (JOURNAL_DTYPE.itemsize // 2))
+
+    state = StateJournal(path)
+    assert state.done == {0.5: 2, -0.5: 1}
+    assert state.timed_out == {0.5: 1}
+    # Journal was compacted on load
+    assert path.stat().st_size == 3 * JOURNAL_DTYPE.itemsize
+    state.append(DONE, -0.5)
+    state.close()
+    assert StateJournal(path).done == {0.5: 2, -0.5: 2}
+
+
+def test_journal_is_compacted(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(journal, 'COMPACT_EVENTS', 8)
+    path = tmp_path / 'journal'
+    state = StateJournal(path)
+    for i in range(20):
+        state.append(DONE, i % 2 / 2)
+    assert path.stat().st_size < 8 * JOURNAL_DTYPE.itemsize
+    state.close()
+    assert StateJournal(path).done == {0.0: 10, 0.5: 10}
@@ -0,0 +1,36 @@
+import pickle
+
+from DLA.archive import ARCHIVE_FOLDER, ResultsArchive
+from DLA.results import dumps
+from DLA.server.manifest import Manifest
+
+
+def test_manifest_counts_results(tmp_path) -> None:
+    manifest = Manifest(tmp_path)
+    manifest.add('a' * 32, 0.5, 'first.pickle', 10)
+    manifest.add('b' * 32, -0.5, 'second.pickle', 20)
+    # Interrupted write
+    with open(manifest.path, 'a') as f:
+        f.write('{"work_id": "c", "mem')
+
+    manifest = Manifest(tmp_path)
+    assert manifest.done == {0.5: 1, -0.5: 1}
+    manifest.add('d' * 32, 0.5, 'third.pickle', 30)
+    assert Manifest(tmp_path).done == {0.5: 2, -0.5: 1}
+    assert [i['work_id'] for i in Manifest(tmp_path).records] == [
+        'a' * 32, 'b' * 32, 'd' * 32
+    ]
+
+
+def test_manifest_is_rebuilt_from_results(tmp_path) -> None:
+    (tmp_path / '1.pickle').write_bytes(pickle.dumps({'memory': 0.5}))
+    (tmp_path / '2.dla').write_bytes(dumps({'memory': -0.5}))
+    archive = ResultsArchive(tmp_path / ARCHIVE_FOLDER)
+    archive.append(0.5, '3.dla', dumps({'memory': 0.5}))
+
+    manifest = Manifest(tmp_path)
+    manifest.add(None, 0.25, 'removed.pickle', 1)
+    manifest.rebuild()
+    assert manifest.done == {0.5: 2, -0.5: 1}
+    assert Manifest(tmp_path).records == manifest.records
+    assert manifest.records[-1]['file'] == f'{ARCHIVE_FOLDER}/0.5.segment'
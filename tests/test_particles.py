@@ -0,0 +1,211 @@
+import numpy as np
+import pytest
+
+from DLA.particles.utils import LeapTable
+
+
+@pytest.mark.parametrize('beta', [0, 0.6, -0.4])
+def test_leap_table_matches_single_steps(beta: float) -> None:
+    alpha, max_leap = 2.0, 7
+    table = LeapTable(alpha, beta, max_leap)
+
+    for k in range(1, max_leap + 1):
+        # Last step and displacement as linear functions of noise
+        noise_to_step = np.zeros((k, k))
+        for t in range(k):
+            noise_to_step[t, t] = alpha
+            if t:
+                noise_to_step[t] += beta * noise_to_step[t - 1]
+        noise_to_out = np.stack(
+            (noise_to_step.sum(axis=0), noise_to_step[-1])
+        )
+        cov = noise_to_out @ noise_to_out.T
+
+        chol = np.array([
+            [table.l11[k], 0],
+            [table.l21[k], table.l22[k]],
+        ])
+        assert np.allclose(chol @ chol.T, cov)
+        assert np.isclose(
+            table.disp_mean[k], sum(beta ** t for t in range(1, k + 1))
+        )
+        assert np.isclose(table.step_mean[k], beta ** k)
+
+
+def test_leap_stays_in_reach() -> None:
+    table = LeapTable(2.0, 0.5, 64)
+    last_step = np.array([[0., 0.], [3., -1.], [0., 0.], [np.nan, np.nan]])
+    distance = np.array([1., 60., 1e9, 100.])
+    steps = table.max_leap(last_step, distance, 6.0)
+
+    assert steps[0] < 1
+    assert 1 < steps[1] < 64
+    assert steps[2] == 64
+    assert steps[3] < 1
+
+
+def test_bitmap_selects_every_colliding_walker() -> None:
+    from DLA.config import CONFIG
+    from DLA.plane import plane
+
+    np.random.seed(0)
+    p = plane.Plane.new(CONFIG)
+    stuck = p._stuck_points
+    for point in np.random.uniform(150, 360, (100, 2)):
+        stuck.add_stuck(point)
+
+    walkers = np.random.uniform(100, 410, (2000, 2))
+    steps = np.random.standard_normal((2000, 2)) * stuck.max_step / 2
+    may_collide = stuck.may_collide(walkers, np.hypot(*steps.T))
+    times = stuck.collision_times(walkers, steps)
+
+    assert not may_collide.all()
+    assert (times[~may_collide] > 1).all()
+    assert (times[may_collide] <= 1).any()
+
+
+def _crowded_plane(seed: int):
+    from DLA.config import CONFIG
+    from DLA.plane import plane
+
+    np.random.seed(seed)
+    p = plane.Plane.new(CONFIG)
+    for point in np.random.uniform(220, 292, (20, 2)):
+        p._stuck_points.add_stuck(point)
+    walkers = p._walking_points
+    walkers.pos[:] = np.random.uniform(120, 392, walkers.pos.shape)
+    walkers.last_step[:] = np.random.standard_normal(walkers.pos.shape) * 4
+    walkers.step_len[:] = np.hypot(*walkers.last_step.T)
+    return p
+
+
+@pytest.mark.parametrize('memory', [1, -1, 1.5, float('nan')])
+def test_memory_without_stationary_steps_is_rejected(
+    make_config,
+    memory: float
+) -> None:
+    # Bound of step used by bitmap doesn't exist for such memory
+    with pytest.raises(ValueError, match='memory'):
+        make_config(simulation={'memory': memory})
+
+
+def test_is_stuck_keeps_order_of_restarted_scan() -> None:
+    from numpy import NaN
+
+    p = _crowded_plane(3)
+    walkers, stuck = p._walking_points, p._stuck_points
+    start = stuck.filled
+    walkers.is_stuck(stuck)
+    expected = stuck.view[start:].copy()
+    assert expected.shape[0] > 10
+
+    p = _crowded_plane(3)
+    walkers, stuck = p._walking_points, p._stuck_points
+    while True:
+        times = stuck.collision_times(walkers.pos, walkers.last_step)
+        colliding = np.flatnonzero(times <= 1)
+        if not colliding.size:
+            break
+        i = colliding[0]
+        if times[i] < 0:
+            walkers.try_to_push_out(
+                walkers.pos[i], walkers.last_step[i], times[i], stuck
+            )
+        else:
+            walkers.pass_to_stuck(
+                walkers.pos[i], walkers.last_step[i], times[i], stuck
+            )
+        walkers[i] = NaN
+
+    assert np.array_equal(stuck.view[start:], expected)
+
+
+def test_walkers_respawn_on_launch_circle(make_config) -> None:
+    from DLA.particles.walking_particles import WalkingParticles
+    from DLA.plane import plane
+
+    config = make_config(particles={'spawn': 'circle', 'in_flight': 1000})
+    margin = config.launch_margin
+    p = plane.Plane.new(config)
+    stuck = p._stuck_points
+    center = stuck[0].copy()
+
+    walkers = WalkingParticles(100, config)
+    assert np.allclose(np.hypot(*(walkers.pos - center).T), margin)
+
+    for point in center + np.array([[6., 0.], [12., 0.], [12., 6.]]):
+        stuck.add_stuck(point)
+    launch_radius = stuck.cluster_radius + margin
+    kill_radius = config.kill_factor * launch_radius
+    walkers.pos[:50] = center + [kill_radius + 1, 0]
+    walkers.pos[50:] = center + [kill_radius - 1, 0]
+    walkers.last_step[:] = walkers.clearance[:] = 1.
+    walkers.respawn(stuck)
+
+    distance = np.hypot(*(walkers.pos[:50] - center).T)
+    assert np.allclose(distance, launch_radius)
+    assert not walkers.last_step[:50].any()
+    assert not walkers.clearance[:50].any()
+    assert np.all(walkers.pos[50:] == center + [kill_radius - 1, 0])
+
+
+def test_stuck_walkers_are_launched_again(make_config) -> None:
+    from DLA.plane import plane
+
+    config = make_config(particles={'spawn': 'circle', 'in_flight': 10})
+    p = plane.Plane.new(config)
+    walkers, stuck = p._walking_points, p._stuck_points
+    assert walkers.size == 10
+    assert stuck.size == config.num_of_particles + 1
+
+    walkers.last_step[:] = stuck[0] - walkers.pos
+    walkers.step_len[:] = np.hypot(*walkers.last_step.T)
+    walkers.is_stuck(stuck)
+
+    assert stuck.filled > 1
+    assert walkers.waiting == stuck.size - 10 - stuck.filled
+    assert not np.isnan(walkers.pos).any()
+    distance = np.hypot(*(walkers.pos - stuck[0]).T)
+    assert np.all(distance > stuck.cluster_radius + 2 * config.radius)
+
+
+def test_leap_beyond_safe_square_is_checked(make_config) -> None:
+    from DLA.plane import plane
+
+    config = make_config(system={'max_leap': 16})
+    walkers = plane.Plane.new(config)._walking_points
+    low = walkers.border_u_l
+    leaping = np.arange(3)
+    walkers.pos[leaping] = [(low + 3, 100), (300, 300), (200, 200)]
+    walkers.clearance[leaping] = 50
+    walkers.leap_len[leaping] = 8
+    walkers.leap_radius[leaping] = 10
+    disp = np.array([(-20., 0.), (1., 1.), (15., 0.)])
+    step = np.array([(-2., 1.), (1., 1.), (2., 0.)])
+    walkers.leaps.sample = lambda *args: (disp.copy(), step.copy())
+    walkers._finish_leap(leaping)
+
+    # Stopped on the wall, with step reversed along its axis
+    assert np.array_equal(walkers.pos[0], (low, 100))
+    assert np.array_equal(walkers.last_step[0], (2, 1))
+    assert np.array_equal(walkers.pos[1:3], [(301, 301), (215, 200)])
+    assert np.array_equal(walkers.last_step[1:3], step[1:])
+    assert np.allclose(walkers.clearance[leaping], (0, 50 - np.sqrt(2), 0))
+    assert not walkers.leap_len[leaping].any()
+
+
+def test_remove_keeps_live_walkers_in_front() -> None:
+    from DLA.config import CONFIG
+    from DLA.particles.walking_particles import WalkingParticles
+
+    walkers = WalkingParticles(10, CONFIG)
+    walkers.pos[:, 0] = walkers.step_len[:] = np.arange(10)
+    walkers.remove(np.array([8, 2, 9, 0]))
+
+    assert walkers.size == 6
+    assert sorted(walkers.pos[:, 0]) == [1, 3, 4, 5, 6, 7]
+    assert np.all(walkers.step_len == walkers.pos[:, 0])
+    assert all(
+        getattr(walkers, name).shape[0] == 6
+        for name in WalkingParticles._per_walker
+    )
@@ -1,19 +1,17 @@
-from typing import List
+from typing import Callable, List
 import pytest
-from pytest import MonkeyPatch
-from DLA.plane import plane, base_plane
+from DLA.config import CONFIG, Config
+from DLA.plane import plane
 from DLA.plane import dimension
 
 
-def test_add_point(monkeypatch: MonkeyPatch) -> None:
-    from DLA.plane import plane, base_plane
-    monkeypatch.setattr(plane, 'WINDOW_SIZE', 512)
-    monkeypatch.setattr(plane, 'SECOND_MIN_BOX_SIZE', 32)
-    monkeypatch.setattr(plane, 'STARTING_POS', (14, 16))
-    monkeypatch.setattr(plane, 'NUM_OF_PARTICLES', 0)
-    monkeypatch.setattr(base_plane, 'RADIUS', 1)
+def test_add_point(make_config: Callable[..., Config]) -> None:
+    config = make_config(
+        display={'window_size': 512},
+        particles={'start_pos': (14, 16), 'num': 0, 'radius': 1},
+    )
 
-    p = plane.Plane.new()
+    p = plane.Plane.new(config)
     assert len(p) == 1  # type: ignore
     assert p[0]  # type: ignore
     assert len(p[0]) == 1  # type: ignore
@@ -41,27 +39,16 @@ def test_add_point(monkeypatch: MonkeyPatch) -> None:
     (8, [371, 1390, 5332, 20805, 82045, 325693]),
 ])
 def test_calc_dimension(
-    monkeypatch: MonkeyPatch, points: int, results: List[int]
+    make_config: Callable[..., Config], points: int, results: List[int]
 ) -> None:
-    from DLA.plane import collision_plane
-    monkeypatch.setattr(plane, 'WINDOW_SIZE', 128)
-    monkeypatch.setattr(plane, 'SECOND_MIN_BOX_SIZE', 1/32)
-    monkeypatch.setattr(plane, 'NUM_OF_PARTICLES', 8)
-    monkeypatch.setattr(plane, 'RADIUS', 2)
-    monkeypatch.setattr(plane, 'STARTING_POS', (64, 64))
-    monkeypatch.setattr(
-        plane.NeighbouringPlanes,
-        '_size_for_alt_plane_type',
-        1 / 32)
-    monkeypatch.setattr(base_plane, 'RADIUS', 2)
-    monkeypatch.setattr(dimension, 'MIN_BOX_SIZE', 1/64)
-    monkeypatch.setattr(dimension, 'SECOND_MIN_BOX_SIZE', 1/32)
-    monkeypatch.setattr(
-        collision_plane.SubPlaneParticlesAndIndivisible,
-        '_size_for_alt_plane_type',
-        1 / 32)
-
-    p = plane.Plane.new()
+    config = make_config(
+        display={'window_size': 128},
+        particles={'start_pos': (64, 64), 'num': 8, 'radius': 2},
+        planes={'min_box_size': 1/64},
+    )
+    assert config.second_min_box_size == 1/32
+
+    p = plane.Plane.new(config)
     stuck_points = p._stuck_points.pos
     stuck_points[1:, :] = [
         [10, 10],  # 1
@@ -73,7 +60,6 @@ def test_calc_dimension(
         [16, 0],  # 7
         [17, 1],  # 8
     ]
-    dimension.Dimension.init_lookup()
 
     for i in range(1, points + 1):
         p.add_point(i)
@@ -86,3 +72,173 @@ def test_calc_dimension(
     assert dim[1/16] == results[3]
     assert dim[1/32] == results[4]
     assert dim[1/64] == results[5]
+
+
+def test_flat_plane_matches_object_tree() -> None:
+    import numpy as np
+    from DLA.plane.flat_plane import FlatPlane
+
+    np.random.seed(1)
+    flat = FlatPlane.new(CONFIG)
+    tree = plane.Plane((0, 0), flat.size, flat._stuck_points)
+    tree.add_point(0)
+
+    points = np.concatenate((
+        np.random.uniform(220, 292, (80, 2)),
+        np.random.uniform(0, 8, (10, 2)),
+        np.random.uniform(504, 512, (10, 2)),
+        [[1, 300], [300, 511], [511, 2]],
+    ))
+    stuck = flat._stuck_points
+    for point in points:
+        stuck.add_stuck(point)
+        tree.add_point(stuck.filled - 1)
+
+    flat_dim = dimension.Dimension(flat)
+    flat_dim.count()
+    tree_dim = dimension.Dimension(tree)
+    tree_dim.count()
+    assert flat_dim == tree_dim
+
+    walkers = np.random.uniform(200, 312, (300, 2))
+    steps = np.random.standard_normal((300, 2)) * 3
+    assert np.array_equal(
+        flat.collision_times(walkers, steps),
+        tree.collision_times(walkers, steps)
+    )
+    assert flat.collision_time(walkers[0], steps[0]) == \
+        tree.collision_time(walkers[0], steps[0])
+
+
+def _count_by_traversal(p, config, counts) -> None:
+    if p.full:
+        boxes = 4
+        size = p.size / 2
+        while size >= config.min_box_size:
+            counts[size] = counts.get(size, 0) + boxes
+            boxes *= 4
+            size /= 2
+        return
+
+    counts[p.size / 2] = counts.get(p.size / 2, 0) + len(p)
+    if p.size == config.second_min_box_size:
+        return
+    for i in p:
+        _count_by_traversal(i, config, counts)
+
+
+def test_box_counts_are_updated_while_planes_grow(
+    make_config: Callable[..., Config]
+) -> None:
+    import numpy as np
+    from DLA.plane.flat_plane import FlatPlane
+
+    config = make_config(
+        display={'window_size': 128},
+        particles={'start_pos': (64, 64), 'num': 200, 'radius': 2},
+        planes={'min_box_size': 1/8},
+    )
+    tree = plane.Plane.new(config)
+    flat = FlatPlane.new(config)
+    rng = np.random.default_rng(4)
+    points = np.concatenate((
+        rng.uniform(50, 78, (150, 2)), rng.uniform(0, 128, (50, 2))
+    ))
+    for i, point in enumerate(points):
+        tree._stuck_points.add_stuck(point)
+        flat._stuck_points.add_stuck(point)
+        if i % 40:
+            continue
+
+        counts: dict = {}
+        _count_by_traversal(tree, config, counts)
+        for neighbour in tree.neighbours:
+            _count_by_traversal(neighbour, config, counts)
+        box_size, num_of_boxes = tree.count_boxes()
+        assert dict(zip(box_size, num_of_boxes)) == {
+            k: counts.get(k, 0) for k in box_size
+        }
+        assert np.array_equal(flat.count_boxes()[1], num_of_boxes)
+
+
+@pytest.mark.parametrize('min_box_size, max_pairs', [
+    (1/8, 1 << 12), (1/32, 1 << 12), (1/32, 64)
+])
+def test_box_counting_from_points_matches_planes(
+    make_config: Callable[..., Config],
+    monkeypatch: pytest.MonkeyPatch,
+    min_box_size: float,
+    max_pairs: int
+) -> None:
+    import numpy as np
+    from DLA.plane import box_counting
+
+    monkeypatch.setattr(box_counting, 'MAX_PAIRS', max_pairs)
+    config = make_config(
+        display={'window_size': 128},
+        particles={'start_pos': (64, 64), 'num': 150, 'radius': 2},
+        planes={'min_box_size': min_box_size},
+    )
+    p = plane.Plane.new(config)
+    rng = np.random.default_rng(7)
+    points = np.concatenate((
+        # Points on borders of boxes
+        [[10, 10], [2, 2], [3, 2], [11, 12], [16, 0], [17, 1], [126, 1]],
+        rng.uniform(50, 78, (100, 2)),
+        rng.uniform(-1, 129, (43, 2)),
+    ))
+    for point in points:
+        p._stuck_points.add_stuck(point)
+
+    box_size, num_of_boxes = box_counting.count_boxes(
+        p._stuck_points.view, 2, 128, min_box_size
+    )
+    expected_size, expected_num = p.count_boxes()
+    assert np.array_equal(box_size, expected_size)
+    assert np.array_equal(num_of_boxes, expected_num)
+
+
+@pytest.mark.parametrize('flat_tree, cutoff, second_min_box_size', [
+    (False, 1, 2),
+    (True, 1, 2),
+    # Clamped to eighth of plane with particles
+    (False, 16, 8),
+    (True, 16, 8),
+])
+def test_planes_with_cutoff_count_the_same_boxes(
+    make_config: Callable[..., Config],
+    flat_tree: bool,
+    cutoff: float,
+    second_min_box_size: float
+) -> None:
+    import numpy as np
+    from DLA.plane.flat_plane import FlatPlane
+
+    plane_type = FlatPlane if flat_tree else plane.Plane
+    config = make_config(
+        display={'window_size': 128},
+        particles={'start_pos': (64, 64), 'num': 200, 'radius': 2},
+        planes={'min_box_size': 1/16},
+    )
+    cutoff_config = make_config(
+        display={'window_size': 128},
+        particles={'start_pos': (64, 64), 'num': 200, 'radius': 2},
+        planes={'min_box_size': 1/16, 'cutoff_box_size': cutoff},
+    )
+    assert cutoff_config.particle_plane_size == 32
+    assert cutoff_config.second_min_box_size == second_min_box_size
+    full = plane_type.new(config)
+    cut = plane_type.new(cutoff_config)
+
+    rng = np.random.default_rng(5)
+    points = np.concatenate((
+        rng.uniform(54, 74, (150, 2)), rng.uniform(-1, 129, (50, 2))
+    ))
+    for i, point in enumerate(points):
+        full._stuck_points.add_stuck(point)
+        cut._stuck_points.add_stuck(point)
+        if i % 60 == 0 or i == len(points) - 1:
+            box_size, num_of_boxes = cut.count_boxes()
+            expected_size, expected_num = full.count_boxes()
+            assert np.array_equal(box_size, expected_size)
+            assert np.array_equal(num_of_boxes, expected_num)
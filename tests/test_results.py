@@ -0,0 +1,50 @@
+import pickle
+
+import numpy as np
+
+from DLA.results import convert, load, read_info, result_files
+from DLA.simulation import Simulation
+from DLA.sweep import count_results
+
+
+def test_columnar_result_matches_pickle(make_config, tmp_path) -> None:
+    config = make_config(
+        particles={'num': 30},
+        system={'max_steps': 30, 'seed': 3, 'result_format': 'columnar'},
+    )
+    simulation = Simulation(config, tmp_path)
+    simulation.run()
+    path = simulation.save_data()
+    assert path.suffix == '.dla'
+
+    expected = simulation.get_data()
+    loaded = load(path)
+    assert loaded.keys() == expected.keys()
+    for name, value in expected.items():
+        if isinstance(value, np.ndarray):
+            assert isinstance(loaded[name], np.memmap)
+            assert loaded[name].ctypes.data % 64 == 0
+            assert loaded[name].dtype == value.dtype
+            assert np.array_equal(loaded[name], value)
+        else:
+            assert loaded[name] == value
+    assert read_info(path)['memory'] == config.beta
+
+
+def test_pickle_is_converted(make_config, tmp_path) -> None:
+    config = make_config(particles={'num': 30}, system={'max_steps': 30})
+    simulation = Simulation(config, tmp_path)
+    simulation.run()
+    pickle_path = simulation.save_data()
+    pickle_path.with_name('other.pickle').write_bytes(
+        pickle_path.read_bytes()
+    )
+
+    path = convert(pickle_path)
+    expected = pickle.loads(pickle_path.read_bytes())
+    loaded = load(path)
+    for name, value in expected.items():
+        assert np.array_equal(loaded[name], value)
+    assert read_info(pickle_path) == read_info(path)
+    assert len(result_files(tmp_path)) == 3
+    assert count_results(tmp_path) == {config.beta: 3}
@@ -0,0 +1,131 @@
+import asyncio
+from types import SimpleNamespace
+from typing import List
+
+import pytest
+
+import DLA.server
+from DLA.server.config import config_dict
+
+# Set by `python -m DLA server` before server modules are imported
+DLA.server.config_dict = config_dict
+
+from DLA.archive import ARCHIVE_FOLDER, ResultsArchive  # noqa: E402
+from DLA.server.server_handler import Handler  # noqa: E402
+from DLA.server.work_generator import WorkGenerator  # noqa: E402
+
+
+class FakeConnection:
+    def __init__(self, filename: str, data: bytes, beta: float) -> None:
+        self.chunks: List[bytes] = [
+            bytes([len(filename)]), filename.encode('utf-8'), data
+        ]
+        self.beta = beta
+        self.work_id = 'a' * 32
+
+    async def read(self, size: int) -> bytes:
+        return self.chunks.pop(0)
+
+    def info(self, msg: str) -> None:
+        pass
+
+    warning = error = info
+
+
+class BrokenManifest:
+    def add(self, *args) -> None:
+        raise OSError('No space left on device')
+
+
+@pytest.mark.parametrize('archive', [False, True])
+def test_result_missing_from_manifest_is_removed(tmp_path, archive) -> None:
+    archived = ResultsArchive(tmp_path / ARCHIVE_FOLDER)
+    if archive:
+        archived.append(0.5, 'kept.pickle', b'kept')
+    handler = Handler(
+        tmp_path, None,
+        SimpleNamespace(manifest=BrokenManifest()),  # type: ignore
+        archive
+    )
+
+    saved = asyncio.run(handler.save_results(
+        FakeConnection('lost.pickle', b'lost', 0.5)  # type: ignore
+    ))
+
+    assert not saved
+    assert not (tmp_path / 'lost.pickle').exists()
+    assert [i['name'] for i in archived.entries()] == (
+        [b'kept.pickle'] if archive else []
+    )
+
+
+async def _waiting(work_gen: WorkGenerator, num: int) -> List[asyncio.Task]:
+    waiters = [asyncio.create_task(work_gen.get()) for _ in range(num)]
+    await asyncio.sleep(0)
+    assert not any(i.done() for i in waiters)
+    return waiters
+
+
+def test_timed_out_work_wakes_one_waiting_client(tmp_path) -> None:
+    async def run() -> None:
+        work_gen = WorkGenerator(0, 1, 0.5, 1)
+        work_gen.configure(tmp_path)
+        first, second = await work_gen.get(), await work_gen.get()
+        waiters = await _waiting(work_gen, 2)
+
+        await work_gen.work_timed_out(first)
+        await asyncio.sleep(0)
+        assert [i.result() for i in waiters if i.done()] == [first]
+        assert await work_gen.are_values_left()
+
+        await work_gen.work_timed_out(second)
+        assert await asyncio.gather(*waiters) == [first, second]
+        work_gen.close()
+
+    asyncio.run(run())
+
+
+def test_timed_out_work_is_distributed_first(tmp_path) -> None:
+    async def run() -> None:
+        work_gen = WorkGenerator(0, 1, 0.5, 3)
+        work_gen.configure(tmp_path)
+        val = await work_gen.get()
+        await work_gen.get()
+        await work_gen.work_timed_out(val)
+        assert work_gen.queue[0] == val
+        assert await work_gen.get() == val
+        work_gen.close()
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize('missing', [False, True])
+def test_waiting_clients_get_missing_works_at_end(tmp_path, missing) -> None:
+    async def run() -> None:
+        work_gen = WorkGenerator(0, 1, 0.5, 1)
+        work_gen.configure(tmp_path)
+        first, second = await work_gen.get(), await work_gen.get()
+        waiters = await _waiting(work_gen, 2)
+
+        work_gen.manifest.add('a' * 32, first, 'first.pickle', 1)
+        await work_gen.work_completed(first)
+        await asyncio.sleep(0)
+        assert not any(i.done() for i in waiters)
+        if not missing:
+            work_gen.manifest.add('b' * 32, second, 'second.pickle', 1)
+        await work_gen.work_completed(second)
+
+        if missing:
+            assert await waiters[0] == second
+            await asyncio.sleep(0)
+            # Missing work can still time out
+            assert not waiters[1].done()
+            work_gen.manifest.add('b' * 32, second, 'second.pickle', 1)
+            await work_gen.work_completed(second)
+        assert await asyncio.gather(*waiters[missing:]) == [None] * (
+            2 - missing
+        )
+        assert not await work_gen.are_values_left()
+        work_gen.close()
+
+    asyncio.run(run())
@@ -0,0 +1,173 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from DLA.config import Config
+from DLA.simulation import Simulation
+
+
+def _interrupt(config: Config, checkpoint: Path, out_dir: Path) -> None:
+    """
+    Runs simulation with checkpoints, until it's interrupted after 260
+    updates.
+    """
+    simulation = Simulation(config, out_dir)
+    update = simulation.update
+
+    def interrupted_update() -> None:
+        if simulation.num_of_iterations == 260:
+            raise KeyboardInterrupt
+        update()
+
+    simulation.update = interrupted_update  # type: ignore
+    with pytest.raises(KeyboardInterrupt):
+        simulation.run(checkpoint)
+
+
+def test_simulations_in_one_process_are_independent(make_config) -> None:
+    config = make_config(
+        particles={'num': 200},
+        system={'max_steps': 300, 'seed': 5},
+    )
+    first = Simulation(config)
+    first.run()
+    other = Simulation(
+        make_config(particles={'num': 50, 'radius': 2}, system={'seed': 1})
+    )
+    other.run()
+    second = Simulation(config)
+    second.run()
+
+    assert first.num_of_iterations == second.num_of_iterations == 300
+    assert first.stuck_particles.filled > 1
+    assert np.array_equal(
+        first.stuck_particles.view, second.stuck_particles.view
+    )
+    assert first.dimension() == second.dimension()
+    assert other.plane.config.radius == 2
+    assert first.get_data()['num_of_particles'] == 200
+
+
+@pytest.mark.parametrize('sections', [
+    {'planes': {'flat_tree': True}},
+    {'planes': {'flat_tree': False}},
+    {'planes': {'collision_engine': 'grid'}},
+    {'system': {'max_leap': 16}},
+    {'particles': {'spawn': 'circle'}},
+], ids=['flat_tree', 'object_tree', 'grid', 'max_leap', 'spawn_on_circle'])
+def test_resumed_simulation_continues_exactly(
+    make_config,
+    tmp_path,
+    sections
+) -> None:
+    system = {'max_steps': 300, 'seed': 2, 'checkpoint_steps': 120}
+    system.update(sections.get('system', {}))
+    config = make_config(
+        particles={'num': 2000, **sections.get('particles', {})},
+        system=system,
+        planes=sections.get('planes', {}),
+    )
+    whole = Simulation(config)
+    whole.run()
+    checkpoint = tmp_path / 'checkpoint.ckpt'
+    _interrupt(config, checkpoint, tmp_path)
+
+    resumed = Simulation.from_checkpoint(checkpoint)
+    assert resumed.num_of_iterations == 240
+    resumed.run(checkpoint)
+
+    assert not checkpoint.exists()
+    assert whole.stuck_particles.filled > 100
+    assert resumed.num_of_iterations == whole.num_of_iterations
+    assert np.array_equal(
+        resumed.stuck_particles.view, whole.stuck_particles.view
+    )
+    assert np.array_equal(
+        resumed.walking_particles.pos, whole.walking_particles.pos
+    )
+    assert resumed.dimension() == whole.dimension()
+
+
+def test_resumed_simulation_keeps_metrics(
+    make_config,
+    tmp_path,
+    monkeypatch
+) -> None:
+    from DLA import recorder
+
+    monkeypatch.setattr(recorder, 'RECORD_CHUNK', 4)
+    config = make_config(
+        particles={'num': 200},
+        system={
+            'max_steps': 300, 'seed': 2, 'checkpoint_steps': 120,
+            'record_steps': 50,
+        },
+    )
+    whole = Simulation(config, tmp_path)
+    whole.run()
+    checkpoint = tmp_path / 'checkpoint.ckpt'
+    _interrupt(config, checkpoint, tmp_path)
+
+    resumed = Simulation.from_checkpoint(checkpoint)
+    resumed.run()
+    expected = recorder.load_metrics(
+        whole.save_data(tmp_path).with_suffix('.metrics')
+    )
+    metrics = recorder.load_metrics(
+        resumed.save_data(tmp_path).with_suffix('.metrics')
+    )
+    assert list(metrics['iteration']) == list(range(50, 350, 50))
+    for name, column in expected.items():
+        assert np.array_equal(metrics[name], column)
+
+
+def test_metrics_are_recorded_next_to_result(
+    make_config,
+    tmp_path,
+    monkeypatch
+) -> None:
+    from DLA import recorder
+
+    # Records are appended to file a few at a time
+    monkeypatch.setattr(recorder, 'RECORD_CHUNK', 4)
+    simulation = Simulation(
+        make_config(
+            particles={'num': 200},
+            system={'max_steps': 95, 'seed': 5, 'record_steps': 10},
+        ),
+        tmp_path
+    )
+    simulation.run()
+    path = simulation.save_data()
+
+    metrics = recorder.load_metrics(path.with_suffix('.metrics'))
+    assert list(metrics['iteration']) == list(range(10, 100, 10)) + [95]
+    stuck = simulation.stuck_particles
+    assert metrics['num_of_stuck'][-1] == stuck.filled
+    assert metrics['cluster_radius'][-1] == stuck.cluster_radius
+    view = stuck.view
+    assert np.isclose(
+        metrics['radius_of_gyration'][-1],
+        np.sqrt(((view - view.mean(axis=0)) ** 2).sum(axis=1).mean())
+    )
+    for size, num in simulation.dimension().items():
+        assert metrics[f'boxes_{size}'][-1] == num
+    assert sorted(tmp_path.iterdir()) == sorted(
+        [path, path.with_suffix('.metrics')]
+    )
+
+
+def test_results_saved_at_the_same_time_are_kept(
+    make_config,
+    tmp_path,
+    monkeypatch
+) -> None:
+    from DLA import simulation
+
+    monkeypatch.setattr(simulation, 'timestamp', lambda: 'same')
+    first = Simulation(make_config(system={'max_steps': 5}), tmp_path)
+    first.run()
+    paths = {first.save_data(), first.save_data()}
+    assert len(paths) == 2
+    assert all(path.exists() for path in paths)
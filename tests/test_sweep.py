@@ -0,0 +1,29 @@
+from copy import deepcopy
+
+from DLA.config import config_dict
+from DLA.sweep import count_results, memory_values, sweep
+
+
+def test_sweep_skips_saved_results(tmp_path) -> None:
+    simulation = deepcopy(config_dict)
+    simulation['particles']['num'] = 20
+    simulation['system']['max_steps'] = 20
+    config = {
+        'server': {
+            'start': 0.0, 'end': 1.0, 'step': 0.5, 'num_of_samples': 2
+        },
+        'simulation': simulation,
+    }
+
+    sweep(deepcopy(config), tmp_path, 1)
+    assert count_results(tmp_path) == {0.0: 2, 0.5: 2}
+
+    for result in sorted(tmp_path.glob('*.pickle'))[:3]:
+        result.unlink()
+    sweep(deepcopy(config), tmp_path, 1, replicas=2)
+    assert count_results(tmp_path) == {0.0: 2, 0.5: 2}
+    assert len(list(tmp_path.iterdir())) == 4
+
+
+def test_memory_values_match_work_generator() -> None:
+    assert memory_values(-1.0, 1.0, 0.5) == [-1.0, -0.5, 0.0, 0.5]
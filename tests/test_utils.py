@@ -1,3 +1,4 @@
+from DLA.config import CONFIG
 from DLA.utils import one_sub_plane_coords
 import pytest
 import numpy as np
@@ -12,3 +13,144 @@ import numpy as np
 def test_one_subchunk_coords(idx, result):
     assert one_sub_plane_coords(
         np.array((0, 0), dtype=np.double), 512, idx) == result
+
+
+@pytest.fixture
+def collision_setup():
+    from DLA.plane import plane
+
+    np.random.seed(0)
+    p = plane.Plane.new(CONFIG)
+    stuck = p._stuck_points
+    for point in np.random.uniform(200, 312, (60, 2)):
+        stuck.add_stuck(point)
+
+    walkers = np.random.uniform(190, 322, (500, 2))
+    walkers[::7] = np.nan
+    steps = np.random.standard_normal((500, 2)) * 4
+    return p, walkers, steps
+
+
+def test_collision_times_match_single_particle_queries(collision_setup):
+    from DLA.utils import get_collision_time
+
+    p, walkers, steps = collision_setup
+    times = p.collision_cells.collision_times(walkers, steps)
+
+    for walker, step, time in zip(walkers, steps, times):
+        if np.isnan(walker[0]):
+            assert time == 2
+        else:
+            assert time == get_collision_time(
+                p, CONFIG.particle_plane_size, walker, step, CONFIG.radius
+            )
+    assert (times <= 1).any()
+
+
+@pytest.mark.parametrize('threads', [2, 4, 7])
+def test_collision_times_independent_of_threads(collision_setup, threads):
+    p, walkers, steps = collision_setup
+    single = p.collision_cells.collision_times(walkers, steps)
+    multi = p.collision_cells.collision_times(walkers, steps, threads)
+    assert np.array_equal(single, multi)
+
+
+def test_cell_list_finds_the_same_collisions(collision_setup):
+    from DLA.utils import CellList
+
+    p, walkers, steps = collision_setup
+    stuck = p._stuck_points
+    cell_list = CellList(p.size, CONFIG.cell_size, CONFIG.radius, 4)
+    for i, point in enumerate(stuck):
+        cell_list.add_point(point, i)
+
+    tree = p.collision_cells.collision_times(walkers, steps)
+    grid = cell_list.collision_times(stuck.view, walkers, steps)
+    colliding = tree <= 1
+    assert colliding.any()
+    assert np.array_equal(colliding, grid <= 1)
+    assert np.allclose(tree[colliding], grid[colliding], rtol=0, atol=1e-12)
+
+
+def test_clearances_bound_distance_to_stuck_particles(collision_setup):
+    from DLA.utils import CellList
+
+    p, _, steps = collision_setup
+    stuck = p._stuck_points.view
+    walkers = np.random.uniform(
+        CONFIG.radius, p.size - CONFIG.radius, (500, 2)
+    )
+    distance = np.min(
+        np.hypot(*(walkers[:, None] - stuck[None]).transpose(2, 0, 1)),
+        axis=1
+    ) - 2 * CONFIG.radius
+    cell_list = CellList(p.size, CONFIG.cell_size, CONFIG.radius, 4)
+    for i, point in enumerate(stuck):
+        cell_list.add_point(point, i)
+
+    for collision_times in [
+        lambda c: cell_list.collision_times(stuck, walkers, steps, 1, c),
+        lambda c: p.collision_times(walkers, steps, c),
+    ]:
+        times = collision_times(None)
+        clearances = np.zeros(walkers.shape[0])
+        assert np.array_equal(collision_times(clearances), times)
+        assert (clearances <= distance + 1e-9).all()
+        assert (clearances > 4 * CONFIG.radius).any()
+
+        skipped = clearances > np.hypot(*steps.T)
+        assert (collision_times(clearances)[skipped] == 2).all()
+        assert (times[skipped] > 1).all()
+
+
+def test_collision_cells_of_many_planes_are_queried_at_once(
+    collision_setup
+):
+    from DLA.plane import plane
+    from DLA.utils import collision_cells_collision_times
+
+    p, walkers, steps = collision_setup
+    other = plane.Plane.new(CONFIG)
+    for point in np.random.uniform(220, 292, (40, 2)):
+        other._stuck_points.add_stuck(point)
+    planes = [p, other]
+    owners = np.random.randint(0, 2, walkers.shape[0]).astype(np.intc)
+
+    clearances = np.zeros(walkers.shape[0])
+    times = collision_cells_collision_times(
+        [q.collision_cells for q in planes], owners, walkers, steps, 1,
+        clearances
+    )
+    for i, q in enumerate(planes):
+        own = owners == i
+        own_clearances = np.zeros(own.sum())
+        assert np.array_equal(
+            times[own],
+            q.collision_times(walkers[own], steps[own], own_clearances)
+        )
+        assert np.array_equal(clearances[own], own_clearances)
+    assert (times <= 1).any()
+
+
+def test_move_walkers_matches_reflecting_walk():
+    from DLA.utils import move_walkers, update_steps
+
+    np.random.seed(0)
+    pos = np.random.uniform(-10, 30, (300, 2))
+    last_step = np.random.standard_normal((300, 2)) * 5
+    noise = np.random.standard_normal((300, 2))
+    clearances = np.zeros(300)
+
+    expected_step = 0.5 * last_step + 2 * noise
+    expected_pos = pos + expected_step
+    outside = ~((3 < expected_pos) & (expected_pos < 20))
+    expected_step[outside] *= -1
+    expected_pos = np.clip(expected_pos, 3, 20)
+
+    step_len = np.empty(300)
+    update_steps(last_step, step_len, noise, 2, 0.5)
+    assert np.allclose(step_len, np.hypot(*last_step.T))
+    move_walkers(pos, last_step, step_len, clearances, 3, 20)
+    assert np.allclose(pos, expected_pos)
+    assert np.allclose(last_step, expected_step)
+    assert np.allclose(clearances, -step_len)